@@ -0,0 +1,155 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage, Page
+from django.db import close_old_connections
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from . import flat
+from .views import IngredientViewSet, RecipeViewSet, UserViewSet
+
+
+def run_query(func, *args, **kwargs):
+    def run():
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)()
+
+
+def async_read_view(viewset, actions, reader, **initkwargs):
+    sync_view = sync_to_async(viewset.as_view(actions, **initkwargs))
+
+    async def view(request, *args, **kwargs):
+        if request.method != "GET":
+            return await sync_view(request, *args, **kwargs)
+
+        viewset_instance = viewset(**initkwargs)
+        viewset_instance.action_map = {"get": actions["get"]}
+        viewset_instance.args = args
+        viewset_instance.kwargs = kwargs
+        viewset_instance.format_kwarg = None
+        drf_request = viewset_instance.initialize_request(request, *args, **kwargs)
+        viewset_instance.request = drf_request
+        viewset_instance.headers = viewset_instance.default_response_headers
+
+        try:
+            await run_query(viewset_instance.initial, drf_request, *args, **kwargs)
+            response = await reader(viewset_instance, drf_request)
+        except Exception as exc:
+            response = viewset_instance.handle_exception(exc)
+
+        return viewset_instance.finalize_response(
+            drf_request, response, *args, **kwargs
+        )
+
+    view.csrf_exempt = True
+    return view
+
+
+async def paginated_response(view, request, queryset, build):
+    paginator = view.paginator
+    page_size = paginator.get_page_size(request)
+    page_number = request.query_params.get(paginator.page_query_param, 1)
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+
+    def fetch_page(offset):
+        return run_query(lambda: list(queryset[offset : offset + page_size]))
+
+    if page_number in paginator.last_page_strings:
+        # Номер последней страницы известен только после count, поэтому
+        # запросы идут по очереди, а count не повторяется.
+        django_paginator.count = await run_query(queryset.count)
+        page_number = django_paginator.num_pages
+        rows = await fetch_page((page_number - 1) * page_size)
+    else:
+        try:
+            offset = max((int(page_number) - 1) * page_size, 0)
+        except (TypeError, ValueError):
+            offset = 0
+        django_paginator.count, rows = await asyncio.gather(
+            run_query(queryset.count), fetch_page(offset)
+        )
+    try:
+        number = django_paginator.validate_number(page_number)
+    except InvalidPage as exc:
+        raise NotFound(
+            paginator.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+        )
+
+    paginator.page = Page(rows, number, django_paginator)
+    paginator.request = request
+    return paginator.get_paginated_response(await run_query(build, rows))
+
+
+async def read_recipe_list(view, request):
+    queryset = await run_query(lambda: view.filter_queryset(view.get_queryset()))
+    if settings.FLAT_LIST_READS:
+        fields = view.get_sparse_fields()
+        return await paginated_response(
+            view,
+            request,
+            queryset.values(*flat.recipe_columns(fields)),
+            lambda rows: flat.recipes(rows, request, view.viewer_context, fields),
+        )
+    return await paginated_response(
+        view, request, queryset, lambda rows: view.get_serializer(rows, many=True).data
+    )
+
+
+async def read_recipe_detail(view, request):
+    return Response(await run_query(view.get_detail_data))
+
+
+async def read_ingredient_list(view, request):
+    def build():
+        queryset = view.filter_queryset(view.get_queryset())
+        return view.get_serializer(queryset, many=True).data
+
+    return Response(await run_query(build))
+
+
+async def read_subscriptions(view, request):
+    return await paginated_response(
+        view, request, view.get_subscriptions_queryset(), view.get_subscriptions_data
+    )
+
+
+recipe_list = async_read_view(
+    RecipeViewSet,
+    {"get": "list", "post": "create"},
+    read_recipe_list,
+    basename="recipes",
+    detail=False,
+)
+recipe_detail = async_read_view(
+    RecipeViewSet,
+    {
+        "get": "retrieve",
+        "patch": "partial_update",
+        "delete": "destroy",
+    },
+    read_recipe_detail,
+    basename="recipes",
+    detail=True,
+)
+ingredient_list = async_read_view(
+    IngredientViewSet,
+    {"get": "list"},
+    read_ingredient_list,
+    basename="ingredients",
+    detail=False,
+)
+subscriptions = async_read_view(
+    UserViewSet,
+    {"get": "subscriptions"},
+    read_subscriptions,
+    basename="users",
+    detail=False,
+)
@@ -0,0 +1,57 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    # Кеш общий для всех воркеров: отзыв токена в одном процессе сразу
+    # виден остальным.
+
+    def __init__(self, alias, ttl):
+        self.alias = alias
+        self.ttl = ttl
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, key):
+        # Сам токен в ключ кеша не попадает.
+        return "auth-token:" + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        return self.cache.get(self._key(key))
+
+    def set(self, key, user, token):
+        self.cache.set(self._key(key), (user, token), self.ttl)
+
+    def invalidate(self, key):
+        self.cache.delete(self._key(key))
+
+    def invalidate_user(self, user_id, using=None):
+        self.cache.delete_many(
+            [
+                self._key(key)
+                for key in Token.objects.using(using)
+                .filter(user_id=user_id)
+                .values_list("key", flat=True)
+            ]
+        )
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_ALIAS, settings.TOKEN_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
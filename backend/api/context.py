@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.utils.functional import cached_property
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+
+class RelatedIds:
+
+    def __init__(self, queryset, field, max_ids):
+        self.queryset = queryset
+        self.field = field
+        self.max_ids = max_ids
+        self._ids = None
+        self._known = {}
+
+    @property
+    def complete(self):
+        if self._ids is None:
+            ids = list(
+                self.queryset.values_list(self.field, flat=True)[: self.max_ids + 1]
+            )
+            self._ids = set(ids) if len(ids) <= self.max_ids else False
+        return self._ids is not False
+
+    def prime(self, ids):
+        if self.complete:
+            return
+        missing = {pk for pk in ids if pk not in self._known}
+        if not missing:
+            return
+        found = set(
+            self.queryset.filter(**{f"{self.field}__in": missing}).values_list(
+                self.field, flat=True
+            )
+        )
+        for pk in missing:
+            self._known[pk] = pk in found
+
+    def __contains__(self, pk):
+        if self.complete:
+            return pk in self._ids
+        self.prime([pk])
+        return self._known[pk]
+
+
+class ViewerContext:
+
+    def __init__(self, user, max_ids=None):
+        self.user = user if user is not None and user.is_authenticated else None
+        self.max_ids = max_ids or settings.VIEWER_CONTEXT_MAX_IDS
+
+    @cached_property
+    def followed_author_ids(self):
+        return RelatedIds(
+            Subscription.objects.filter(user=self.user), "author_id", self.max_ids
+        )
+
+    @cached_property
+    def favorited_recipe_ids(self):
+        return RelatedIds(
+            Favorite.objects.filter(user=self.user), "recipe_id", self.max_ids
+        )
+
+    @cached_property
+    def cart_recipe_ids(self):
+        return RelatedIds(
+            ShoppingCart.objects.filter(user=self.user), "recipe_id", self.max_ids
+        )
+
+    def prime(self, recipe_ids=(), author_ids=()):
+        if self.user is None:
+            return
+        if recipe_ids:
+            self.favorited_recipe_ids.prime(recipe_ids)
+            self.cart_recipe_ids.prime(recipe_ids)
+        if author_ids:
+            self.followed_author_ids.prime(author_ids)
+
+    def is_subscribed(self, author_id):
+        return self.user is not None and author_id in self.followed_author_ids
+
+    def is_favorited(self, recipe_id):
+        return self.user is not None and recipe_id in self.favorited_recipe_ids
+
+    def is_in_shopping_cart(self, recipe_id):
+        return self.user is not None and recipe_id in self.cart_recipe_ids
+
+
+def get_viewer_context(context):
+    viewer = context.get("viewer")
+    if viewer is None:
+        request = context.get("request")
+        viewer = ViewerContext(request.user if request is not None else None)
+        context["viewer"] = viewer
+    return viewer
+
+
+class ViewerContextMixin:
+
+    @cached_property
+    def viewer_context(self):
+        return ViewerContext(self.request.user)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["viewer"] = self.viewer_context
+        return context
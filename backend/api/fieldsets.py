@@ -0,0 +1,40 @@
+from rest_framework.exceptions import ValidationError
+
+
+def _parse(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def sparse_fields(query_params, available):
+    requested = query_params.get("fields")
+    omitted = query_params.get("omit")
+    if requested is None and omitted is None:
+        return None
+    requested = set(available) if requested is None else _parse(requested)
+    omitted = _parse(omitted or "")
+    for param, names in (("fields", requested), ("omit", omitted)):
+        unknown = names - set(available)
+        if unknown:
+            raise ValidationError(
+                {param: [f"Неизвестные поля: {', '.join(sorted(unknown))}"]}
+            )
+    return tuple(
+        name for name in available if name in requested and name not in omitted
+    )
+
+
+class SparseFieldsetMixin:
+
+    sparse_fieldset_actions = ("list", "retrieve")
+
+    def get_sparse_fields(self, serializer_class=None):
+        if self.action not in self.sparse_fieldset_actions:
+            return None
+        serializer_class = serializer_class or self.get_serializer_class()
+        return sparse_fields(self.request.query_params, serializer_class.Meta.fields)
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+        return super().get_serializer(*args, **kwargs)
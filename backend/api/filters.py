@@ -1,6 +1,7 @@
 from django_filters.rest_framework import FilterSet, filters
 
 from recipes.models import Ingredient, Recipe
+from recipes.search import search_ingredients
 
 
 class IngredientFilter(FilterSet):
@@ -11,15 +12,7 @@ class IngredientFilter(FilterSet):
         fields = ("name",)
 
     def filter_name(self, queryset, name, value):
-        exact_matches = queryset.filter(name=value)
-        if exact_matches.exists():
-            return exact_matches
-
-        startswith_matches = queryset.filter(name__startswith=value)
-        if startswith_matches.exists():
-            return startswith_matches
-
-        return queryset.filter(name__istartswith=value)
+        return search_ingredients(queryset, value)
 
 
 class RecipeFilter(FilterSet):
@@ -0,0 +1,98 @@
+from recipes.models import Recipe
+from users.models import User
+
+PROFILE_FIELDS = ("email", "id", "username", "first_name", "last_name", "avatar")
+
+RECIPE_COLUMNS = {
+    "id": ("id",),
+    "author": ("author_id",)
+    + tuple(f"author__{field}" for field in PROFILE_FIELDS if field != "id"),
+    "ingredients": ("ingredients_snapshot",),
+    "is_favorited": (),
+    "is_in_shopping_cart": (),
+    "name": ("name",),
+    "image": ("image",),
+    "text": ("text",),
+    "cooking_time": ("cooking_time",),
+    "servings": ("servings",),
+}
+
+RECIPE_FIELDS = tuple(
+    column for columns in RECIPE_COLUMNS.values() for column in columns
+)
+
+
+def recipe_columns(fields=None):
+    if fields is None:
+        return RECIPE_FIELDS
+    # id нужен всегда: по нему подгружаются флаги избранного и корзины.
+    return ("id",) + tuple(
+        column for field in fields for column in RECIPE_COLUMNS[field] if column != "id"
+    )
+
+
+def file_url(storage, name, request, empty):
+    if not name:
+        return empty
+    url = storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def _profile(row, request, viewer, prefix="", fields=None):
+    user_id = row["author_id" if prefix else "id"]
+    profile = {
+        "email": row[f"{prefix}email"],
+        "id": user_id,
+        "username": row[f"{prefix}username"],
+        "first_name": row[f"{prefix}first_name"],
+        "last_name": row[f"{prefix}last_name"],
+        "is_subscribed": (
+            viewer.is_subscribed(user_id)
+            if fields is None or "is_subscribed" in fields
+            else None
+        ),
+        "avatar": file_url(
+            User._meta.get_field("avatar").storage,
+            row[f"{prefix}avatar"],
+            request,
+            None,
+        ),
+    }
+    if fields is None:
+        return profile
+    return {field: profile[field] for field in fields}
+
+
+def profiles(rows, request, viewer, fields=None):
+    if fields is None or "is_subscribed" in fields:
+        viewer.prime(author_ids=[row["id"] for row in rows])
+    return [_profile(row, request, viewer, fields=fields) for row in rows]
+
+
+def recipes(rows, request, viewer, fields=None):
+    if fields is None:
+        fields = tuple(RECIPE_COLUMNS)
+    viewer.prime(
+        recipe_ids=(
+            [row["id"] for row in rows]
+            if {"is_favorited", "is_in_shopping_cart"} & set(fields)
+            else ()
+        ),
+        author_ids=[row["author_id"] for row in rows] if "author" in fields else (),
+    )
+    image_storage = Recipe._meta.get_field("image").storage
+    values = {
+        "id": lambda row: row["id"],
+        "author": lambda row: _profile(row, request, viewer, prefix="author__"),
+        "ingredients": lambda row: row["ingredients_snapshot"],
+        "is_favorited": lambda row: viewer.is_favorited(row["id"]),
+        "is_in_shopping_cart": lambda row: viewer.is_in_shopping_cart(row["id"]),
+        "name": lambda row: row["name"],
+        "image": lambda row: file_url(image_storage, row["image"], request, ""),
+        "text": lambda row: row["text"],
+        "cooking_time": lambda row: row["cooking_time"],
+        "servings": lambda row: row["servings"],
+    }
+    return [{field: values[field](row) for field in fields} for row in rows]
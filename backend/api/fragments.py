@@ -0,0 +1,73 @@
+from foodgram.fragments import (
+    PROFILE_FIELDS,
+    RECIPE_BODY_FIELDS,
+    fragments,
+    profile_key,
+    recipe_body_key,
+    recipe_ingredients_key,
+)
+from recipes.models import Recipe
+from recipes.scaling import scale_snapshot
+from users.models import User
+from . import flat
+
+
+def _recipe_loader(recipe_id):
+    def load(missing):
+        row = (
+            Recipe.objects.filter(pk=recipe_id)
+            .values(*RECIPE_BODY_FIELDS, "ingredients_snapshot")
+            .first()
+        )
+        if row is None:
+            return {}
+        snapshot = row.pop("ingredients_snapshot")
+        return {
+            recipe_body_key(recipe_id): row,
+            recipe_ingredients_key(recipe_id): snapshot,
+        }
+
+    return load
+
+
+def _load_profiles(missing):
+    user_ids = [int(key.split(":")[1]) for key in missing]
+    return {
+        profile_key(row.pop("id")): row
+        for row in User.objects.filter(pk__in=user_ids).values("id", *PROFILE_FIELDS)
+    }
+
+
+def recipe_detail(recipe_id, request, viewer, fields=None, servings=None):
+    fields = fields or tuple(flat.RECIPE_COLUMNS)
+    # Тело нужно всегда: по нему видно, что рецепт существует, и в нём автор
+    # и число порций для пересчёта.
+    keys = [recipe_body_key(recipe_id)]
+    if "ingredients" in fields:
+        keys.append(recipe_ingredients_key(recipe_id))
+    found = fragments.get_many(keys, _recipe_loader(recipe_id))
+    if len(found) < len(keys):
+        return None
+
+    body = found[recipe_body_key(recipe_id)]
+    row = {
+        "id": recipe_id,
+        **body,
+        "ingredients_snapshot": found.get(recipe_ingredients_key(recipe_id)),
+    }
+    if "author" in fields:
+        key = profile_key(body["author_id"])
+        profile = fragments.get_many([key], _load_profiles).get(key)
+        if profile is None:
+            return None
+        row.update({f"author__{name}": value for name, value in profile.items()})
+
+    data = flat.recipes([row], request, viewer, fields)[0]
+    if servings is not None:
+        if "ingredients" in data:
+            data["ingredients"] = scale_snapshot(
+                data["ingredients"], body["servings"], servings
+            )
+        if "servings" in data:
+            data["servings"] = servings
+    return data
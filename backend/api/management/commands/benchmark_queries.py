@@ -0,0 +1,109 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.query_catalog import endpoints, run_endpoint
+from foodgram.db.routers import use_primary
+from users.models import User
+
+INDEXES = (
+    "recipe_pub_date_idx",
+    "recipe_author_pub_date_idx",
+    "ingredient_name_like_idx",
+    "ingredient_name_upper_idx",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает время горячих эндпоинтов без индексов рецептов и "
+        "ингредиентов и с ними. Индексы удаляются внутри транзакции, которая "
+        "затем откатывается; на время замера таблицы блокируются, поэтому "
+        "запускать стоит на копии базы"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            required=True,
+            help="Email пользователя, от имени которого делать запросы",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            help="Замерить только указанные эндпоинты, можно повторять",
+        )
+        parser.add_argument("--output", help="Файл для результатов в JSON")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"Пользователь не найден: {options['user']}")
+        catalog = [
+            endpoint
+            for endpoint in endpoints(user)
+            if not options["endpoint"] or endpoint[0] in options["endpoint"]
+        ]
+        if not catalog:
+            raise CommandError("Нет эндпоинтов для замера")
+
+        with use_primary():
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for name in INDEXES:
+                        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+                before = self.measure(catalog, user, options["repeat"])
+                transaction.set_rollback(True)
+            after = self.measure(catalog, user, options["repeat"])
+
+        self.stdout.write(
+            f"{'эндпоинт':<48} {'без индексов':>14} {'с индексами':>14} {'ускорение':>10}"
+        )
+        report = []
+        for endpoint in catalog:
+            name = endpoint[0]
+            speedup = before[name]["median_ms"] / max(after[name]["median_ms"], 1e-6)
+            report.append({"name": name, "before": before[name], "after": after[name]})
+            line = (
+                f"{name:<48} {before[name]['median_ms']:>11.2f} мс "
+                f"{after[name]['median_ms']:>11.2f} мс {speedup:>9.1f}x"
+            )
+            self.stdout.write(self.style.SUCCESS(line) if speedup >= 1.2 else line)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(
+                    {
+                        "database": connection.vendor,
+                        "repeat": options["repeat"],
+                        "indexes": INDEXES,
+                        "endpoints": report,
+                    },
+                    file,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+
+    def measure(self, catalog, user, repeat):
+        results = {}
+        for endpoint in catalog:
+            run_endpoint(endpoint, user)
+            timings, db_timings = [], []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                _, queries = run_endpoint(endpoint, user)
+                timings.append((time.perf_counter() - started) * 1000)
+                db_timings.append(sum(duration for *_, duration in queries) * 1000)
+            timings.sort()
+            results[endpoint[0]] = {
+                "median_ms": round(statistics.median(timings), 3),
+                "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+                "db_median_ms": round(statistics.median(db_timings), 3),
+                "queries": len(queries),
+            }
+        return results
@@ -0,0 +1,57 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from foodgram.db.pool import pool_stats
+
+
+def run_queries(alias, queries, hold):
+    for _ in range(queries):
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+        time.sleep(hold)
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагружает пул соединений с базой из нескольких потоков и выводит "
+        "статистику ожидания"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--threads", type=int, default=20)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument(
+            "--hold",
+            type=float,
+            default=0.005,
+            help="Сколько секунд держать соединение после запроса",
+        )
+
+    def handle(self, *args, **options):
+        if connections[options["database"]].pool is None:
+            self.stdout.write(
+                self.style.WARNING("Пул соединений выключен: задайте DB_POOL_MODE=pool")
+            )
+            return
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(options["threads"]) as executor:
+            for future in [
+                executor.submit(
+                    run_queries,
+                    options["database"],
+                    options["queries"],
+                    options["hold"],
+                )
+                for _ in range(options["threads"])
+            ]:
+                future.result()
+
+        self.stdout.write(f"Время: {time.monotonic() - started:.2f} с")
+        self.stdout.write(json.dumps(pool_stats(), ensure_ascii=False, indent=2))
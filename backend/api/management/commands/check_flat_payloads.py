@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import RecipeViewSet, UserViewSet
+from users.models import User
+
+LIST_ENDPOINTS = (
+    ("/api/recipes/", RecipeViewSet),
+    ("/api/users/", UserViewSet),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает ответы списков, собранные сериализаторами и быстрым "
+        "путем чтения, байт в байт"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", help="Email пользователя, от имени которого делать запросы"
+        )
+        parser.add_argument(
+            "--pages", type=int, default=3, help="Количество проверяемых страниц"
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            user = User.objects.get(email=options["user"])
+
+        factory = APIRequestFactory()
+        mismatches = 0
+        for path, viewset in LIST_ENDPOINTS:
+            view = viewset.as_view({"get": "list"})
+            for page in range(1, options["pages"] + 1):
+                contents = []
+                for flat_reads in (False, True):
+                    request = factory.get(path, {"page": page})
+                    if user is not None:
+                        force_authenticate(request, user=user)
+                    with override_settings(FLAT_LIST_READS=flat_reads):
+                        response = view(request)
+                        response.render()
+                    contents.append((response.status_code, response.content))
+
+                if contents[0] != contents[1]:
+                    mismatches += 1
+                    self.stdout.write(
+                        self.style.ERROR(f"{path}?page={page}: ответы различаются")
+                    )
+                    self.stdout.write(f"  сериализатор: {contents[0][1][:500]!r}")
+                    self.stdout.write(f"  быстрый путь: {contents[1][1][:500]!r}")
+
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"Расхождений: {mismatches}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Ответы совпадают байт в байт"))
@@ -0,0 +1,310 @@
+import json
+import re
+from datetime import datetime
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from api.query_catalog import endpoints, run_endpoint
+from foodgram.admin_tools import estimated_row_count
+from users.models import User
+
+HOT_MODELS = (
+    "recipes.Recipe",
+    "recipes.RecipeIngredient",
+    "recipes.Ingredient",
+    "recipes.Favorite",
+    "recipes.ShoppingCart",
+    "recipes.CartIngredientTotal",
+    "users.Subscription",
+)
+MIN_ESTIMATE_ROWS = 100
+SQLITE_TABLE_RE = re.compile(r"^(?:SCAN|SEARCH) (?:TABLE )?(\w+)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет EXPLAIN для запросов горячих эндпоинтов и отмечает полные "
+        "сканирования, недостающие индексы и ошибки оценки числа строк"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            required=True,
+            help="Email пользователя, от имени которого делать запросы",
+        )
+        parser.add_argument(
+            "--output",
+            help="Файл для результатов в JSON (по умолчанию query-plans-<время>.json)",
+        )
+        parser.add_argument("--baseline", help="JSON предыдущего запуска для сравнения")
+        parser.add_argument(
+            "--seq-scan-rows",
+            type=int,
+            default=1000,
+            help="Полное сканирование таблицы от этого размера считается проблемой",
+        )
+        parser.add_argument(
+            "--regression-factor",
+            type=float,
+            default=1.5,
+            help="Во сколько раз должно вырасти время, чтобы считать это регрессией",
+        )
+        parser.add_argument(
+            "--estimate-factor",
+            type=float,
+            default=10.0,
+            help="Допустимое расхождение оценки и фактического числа строк",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"Пользователь не найден: {options['user']}")
+        self.options = options
+        self.table_rows = {}
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "database": connections["default"].vendor,
+            "endpoints": [],
+            "missing_indexes": self.missing_indexes(),
+        }
+        for endpoint in endpoints(user):
+            status, queries = run_endpoint(endpoint, user)
+            result = {
+                "name": endpoint[0],
+                "status": status,
+                "queries": [
+                    self.explain(alias, sql, duration)
+                    for alias, sql, duration in queries
+                    if sql.lstrip().upper().startswith("SELECT")
+                ],
+            }
+            result["issues"] = sum(len(query["issues"]) for query in result["queries"])
+            report["endpoints"].append(result)
+            self.print_endpoint(result)
+
+        for missing in report["missing_indexes"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Нет индекса: {missing['table']}.{missing['column']} "
+                    f"({missing['reason']})"
+                )
+            )
+
+        output = options["output"] or (
+            f"query-plans-{datetime.now():%Y%m%d-%H%M%S}.json"
+        )
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+        if options["baseline"]:
+            self.compare(report, options["baseline"])
+
+        issues = sum(endpoint["issues"] for endpoint in report["endpoints"])
+        issues += len(report["missing_indexes"])
+        style = self.style.WARNING if issues else self.style.SUCCESS
+        self.stdout.write(style(f"Найдено проблем: {issues}, отчёт: {output}"))
+
+    def explain(self, alias, sql, duration):
+        connection = connections[alias]
+        if connection.vendor == "postgresql":
+            plan, issues, summary = self.explain_postgresql(connection, alias, sql)
+        elif connection.vendor == "sqlite":
+            plan, issues, summary = self.explain_sqlite(connection, alias, sql)
+        else:
+            raise CommandError(f"EXPLAIN не поддерживается для {connection.vendor}")
+        return {
+            "alias": alias,
+            "sql": sql,
+            "duration_ms": round(duration * 1000, 3),
+            **summary,
+            "issues": issues,
+            "plan": plan,
+        }
+
+    def explain_postgresql(self, connection, alias, sql):
+        # ANALYZE выполняет запрос, поэтому на всякий случай откатываем.
+        with transaction.atomic(using=alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")
+                plan = cursor.fetchone()[0]
+            transaction.set_rollback(True, using=alias)
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        plan = plan[0]
+
+        issues = []
+        for node in self.walk(plan["Plan"]):
+            relation = node.get("Relation Name")
+            if node["Node Type"] == "Seq Scan":
+                rows = self.rows(alias, relation)
+                if rows >= self.options["seq_scan_rows"]:
+                    issues.append(
+                        {
+                            "type": "seq_scan",
+                            "relation": relation,
+                            "rows": rows,
+                            "filter": node.get("Filter"),
+                        }
+                    )
+            if node.get("Sort Space Type") == "Disk":
+                issues.append(
+                    {
+                        "type": "sort_on_disk",
+                        "sort_key": node.get("Sort Key"),
+                        "space_kb": node.get("Sort Space Used"),
+                    }
+                )
+            if node.get("Actual Loops"):
+                planned, actual = node["Plan Rows"], node["Actual Rows"]
+                ratio = max(planned, actual) / max(min(planned, actual), 1)
+                if (
+                    ratio >= self.options["estimate_factor"]
+                    and max(planned, actual) >= MIN_ESTIMATE_ROWS
+                ):
+                    issues.append(
+                        {
+                            "type": "row_estimate",
+                            "node": node["Node Type"],
+                            "relation": relation,
+                            "planned": planned,
+                            "actual": actual,
+                        }
+                    )
+
+        top = plan["Plan"]
+        summary = {
+            "planning_ms": plan.get("Planning Time"),
+            "execution_ms": plan.get("Execution Time"),
+            "total_cost": top.get("Total Cost"),
+            "shared_hit_blocks": top.get("Shared Hit Blocks"),
+            "shared_read_blocks": top.get("Shared Read Blocks"),
+        }
+        return plan, issues, summary
+
+    def explain_sqlite(self, connection, alias, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        issues = []
+        for detail in plan:
+            match = SQLITE_TABLE_RE.match(detail)
+            if match and detail.startswith("SCAN") and " USING " not in detail:
+                rows = self.rows(alias, match.group(1))
+                if rows >= self.options["seq_scan_rows"]:
+                    issues.append(
+                        {"type": "seq_scan", "relation": match.group(1), "rows": rows}
+                    )
+            if detail.startswith("USE TEMP B-TREE"):
+                issues.append({"type": "temp_sort", "detail": detail})
+        return plan, issues, {}
+
+    def walk(self, node):
+        yield node
+        for child in node.get("Plans", ()):
+            yield from self.walk(child)
+
+    def rows(self, alias, table):
+        if (alias, table) not in self.table_rows:
+            model = next(
+                (model for model in apps.get_models() if model._meta.db_table == table),
+                None,
+            )
+            rows = None
+            if model is not None:
+                rows = estimated_row_count(model, alias)
+                if rows is None:
+                    rows = model._base_manager.using(alias).count()
+            self.table_rows[(alias, table)] = rows or 0
+        return self.table_rows[(alias, table)]
+
+    def missing_indexes(self):
+        connection = connections["default"]
+        missing = []
+        with connection.cursor() as cursor:
+            for label in HOT_MODELS:
+                model = apps.get_model(label)
+                table = model._meta.db_table
+                constraints = connection.introspection.get_constraints(cursor, table)
+                leading = {
+                    constraint["columns"][0]
+                    for constraint in constraints.values()
+                    if constraint["columns"]
+                    and (
+                        constraint["index"]
+                        or constraint["unique"]
+                        or constraint["primary_key"]
+                    )
+                }
+                wanted = {
+                    field.column: "внешний ключ"
+                    for field in model._meta.concrete_fields
+                    if field.is_relation
+                }
+                for name in model._meta.ordering:
+                    field = model._meta.get_field(name.lstrip("-"))
+                    wanted.setdefault(field.column, "сортировка по умолчанию")
+                missing += [
+                    {"table": table, "column": column, "reason": reason}
+                    for column, reason in sorted(wanted.items())
+                    if column not in leading
+                ]
+        return missing
+
+    def print_endpoint(self, result):
+        line = (
+            f"{result['name']}: статус {result['status']}, "
+            f"запросов {len(result['queries'])}, проблем {result['issues']}"
+        )
+        self.stdout.write(self.style.WARNING(line) if result["issues"] else line)
+        for query in result["queries"]:
+            for issue in query["issues"]:
+                details = ", ".join(
+                    f"{key}={value}" for key, value in issue.items() if key != "type"
+                )
+                self.stdout.write(f"  {issue['type']}: {details}")
+
+    def compare(self, report, baseline_path):
+        with open(baseline_path, encoding="utf-8") as file:
+            baseline = {
+                endpoint["name"]: endpoint for endpoint in json.load(file)["endpoints"]
+            }
+        regressions = 0
+        for endpoint in report["endpoints"]:
+            previous = baseline.get(endpoint["name"])
+            if previous is None:
+                continue
+            changes = []
+            if len(endpoint["queries"]) > len(previous["queries"]):
+                changes.append(
+                    f"запросов {len(previous['queries'])} → "
+                    f"{len(endpoint['queries'])}"
+                )
+            if endpoint["issues"] > previous["issues"]:
+                changes.append(f"проблем {previous['issues']} → {endpoint['issues']}")
+            before = self.total_time(previous)
+            after = self.total_time(endpoint)
+            if before and after > before * self.options["regression_factor"]:
+                changes.append(f"время {before:.1f} → {after:.1f} мс")
+            if changes:
+                regressions += 1
+                self.stdout.write(
+                    self.style.ERROR(f"Регрессия {endpoint['name']}: ")
+                    + "; ".join(changes)
+                )
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS("Регрессий относительно базы нет"))
+
+    @staticmethod
+    def total_time(endpoint):
+        return sum(
+            query.get("execution_ms") or query["duration_ms"]
+            for query in endpoint["queries"]
+        )
@@ -0,0 +1,60 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from foodgram.storage import (
+    ContentAddressedStorage,
+    is_recently_saved,
+    original_name,
+    referenced_names,
+)
+
+
+class Command(BaseCommand):
+    help = "Удаляет файлы медиа, на которые больше не ссылается ни одна запись"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=60 * 60,
+            help="Не трогать файлы, сохранённые менее указанного числа секунд назад",
+        )
+
+    def handle(self, *args, **options):
+        referenced = referenced_names()
+        orphaned = [
+            name
+            for name in self.stored_names()
+            # Сжатая копия живёт, пока используется её исходный файл.
+            if referenced.isdisjoint((name, original_name(name)))
+            and not is_recently_saved(default_storage, name, options["grace"])
+        ]
+        for name in orphaned:
+            self.stdout.write(name)
+            if not options["dry_run"]:
+                default_storage.delete(name)
+
+        verb = "Найдено" if options["dry_run"] else "Удалено"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} неиспользуемых файлов: {len(orphaned)}, "
+                f"используется: {len(referenced)}"
+            )
+        )
+
+    def stored_names(self):
+        root = default_storage.location
+        protected = os.path.abspath(settings.PROTECTED_MEDIA_ROOT)
+        for directory, subdirectories, filenames in os.walk(root):
+            if os.path.abspath(directory) == protected:
+                subdirectories[:] = []
+                continue
+            for filename in filenames:
+                name = os.path.relpath(os.path.join(directory, filename), root)
+                name = name.replace(os.sep, "/")
+                if ContentAddressedStorage.is_hashed_name(name):
+                    yield name
@@ -0,0 +1,106 @@
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection, HTTPSConnection
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def run_client(base_url, paths, headers, deadline):
+    parts = urlsplit(base_url)
+    connection_class = HTTPSConnection if parts.scheme == "https" else HTTPConnection
+    connection = connection_class(parts.netloc, timeout=30)
+    latencies = []
+    errors = 0
+    index = 0
+    while time.monotonic() < deadline:
+        path = parts.path.rstrip("/") + paths[index % len(paths)]
+        index += 1
+        started = time.monotonic()
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except OSError:
+            errors += 1
+            connection.close()
+            continue
+        latencies.append(time.monotonic() - started)
+    connection.close()
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест горячих эндпоинтов чтения: сравнивает пропускную "
+        "способность на ядро для нескольких развертываний (например, WSGI и ASGI)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            action="append",
+            required=True,
+            help="Развертывание в формате имя=http://host:port, можно повторять",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            help="Путь запроса, можно повторять (по умолчанию /api/recipes/)",
+        )
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--duration", type=float, default=20.0)
+        parser.add_argument("--token", help="Токен для заголовка Authorization")
+        parser.add_argument(
+            "--server-cores",
+            type=int,
+            default=os.cpu_count(),
+            help="Количество ядер, выделенных серверу",
+        )
+
+    def handle(self, *args, **options):
+        paths = options["path"] or ["/api/recipes/"]
+        headers = {"Accept": "application/json"}
+        if options["token"]:
+            headers["Authorization"] = f"Token {options['token']}"
+
+        results = []
+        for target in options["target"]:
+            label, separator, base_url = target.partition("=")
+            if not separator:
+                raise CommandError(f"Неверный формат --target: {target}")
+
+            deadline = time.monotonic() + options["duration"]
+            with ThreadPoolExecutor(options["concurrency"]) as executor:
+                futures = [
+                    executor.submit(run_client, base_url, paths, headers, deadline)
+                    for _ in range(options["concurrency"])
+                ]
+                runs = [future.result() for future in futures]
+
+            latencies = sorted(
+                latency for run_latencies, _ in runs for latency in run_latencies
+            )
+            errors = sum(run_errors for _, run_errors in runs)
+            throughput = len(latencies) / options["duration"]
+            results.append((label, throughput, latencies, errors))
+
+        self.stdout.write(
+            f"{'развертывание':<16}{'rps':>10}{'rps/ядро':>10}"
+            f"{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}{'ошибки':>8}"
+        )
+        for label, throughput, latencies, errors in results:
+            if len(latencies) < 2:
+                self.stdout.write(self.style.ERROR(f"{label}: нет успешных ответов"))
+                continue
+            quantiles = statistics.quantiles(latencies, n=100)
+            self.stdout.write(
+                f"{label:<16}{throughput:>10.1f}"
+                f"{throughput / options['server_cores']:>10.1f}"
+                f"{quantiles[49] * 1000:>10.1f}{quantiles[94] * 1000:>10.1f}"
+                f"{quantiles[98] * 1000:>10.1f}{errors:>8}"
+            )
@@ -0,0 +1,96 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from foodgram.compression import (
+    PRECOMPRESSED_SUFFIXES as SUFFIXES,
+    available_encodings,
+    compress,
+)
+
+LEVELS = {"gzip": 9, "br": 11}
+
+
+class Command(BaseCommand):
+    help = (
+        "Создаёт рядом со статикой и медиа сжатые копии .gz и .br, "
+        "которые nginx отдаёт без сжатия на лету"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            help="Каталоги для обработки (по умолчанию STATIC_ROOT и MEDIA_ROOT)",
+        )
+        parser.add_argument(
+            "--min-size", type=int, default=settings.COMPRESSION_MIN_SIZE
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Пересжать файлы, даже если сжатая копия свежее исходника",
+        )
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or [settings.STATIC_ROOT, settings.MEDIA_ROOT]
+        encodings = available_encodings()
+        written = skipped = removed = 0
+        for path in paths:
+            for source in self.files(path):
+                if source.endswith(tuple(SUFFIXES.values())):
+                    if not os.path.exists(os.path.splitext(source)[0]):
+                        os.remove(source)
+                        removed += 1
+                    continue
+                if not self.compressible(source, options["min_size"]):
+                    continue
+                for encoding in encodings:
+                    if self.precompress(source, encoding, options["force"]):
+                        written += 1
+                    else:
+                        skipped += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Сжато файлов: {written}, без изменений: {skipped}, "
+                f"удалено устаревших копий: {removed}"
+            )
+        )
+
+    def files(self, root):
+        protected = os.path.abspath(settings.PROTECTED_MEDIA_ROOT)
+        for directory, subdirectories, filenames in os.walk(root):
+            if os.path.abspath(directory) == protected:
+                subdirectories[:] = []
+                continue
+            for filename in filenames:
+                yield os.path.join(directory, filename)
+
+    def compressible(self, source, min_size):
+        return (
+            os.path.splitext(source)[1].lower() in settings.PRECOMPRESS_EXTENSIONS
+            and os.path.getsize(source) >= min_size
+        )
+
+    def precompress(self, source, encoding, force):
+        target = source + SUFFIXES[encoding]
+        if (
+            not force
+            and os.path.exists(target)
+            and os.path.getmtime(target) >= os.path.getmtime(source)
+        ):
+            return False
+        with open(source, "rb") as file:
+            data = file.read()
+        compressed = compress(data, encoding, LEVELS[encoding])
+        if len(compressed) >= len(data):
+            if os.path.exists(target):
+                os.remove(target)
+            return False
+        temporary = target + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(compressed)
+        os.replace(temporary, target)
+        return True
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SETUP = "import django; django.setup()"
+LOAD_URLS = "from django.urls import get_resolver; get_resolver().url_patterns"
+
+
+class Command(BaseCommand):
+    help = (
+        "Показывает, какие модули и пакеты дольше всего импортируются "
+        "при запуске Django (по данным python -X importtime)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--urls",
+            action="store_true",
+            help="Загрузить URLconf, как это делает воркер gunicorn",
+        )
+        parser.add_argument("--limit", type=int, default=20)
+
+    def handle(self, *args, **options):
+        code = SETUP + (f"; {LOAD_URLS}" if options["urls"] else "")
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        started = time.monotonic()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        elapsed = time.monotonic() - started
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        modules = list(self.parse(result.stderr))
+        packages = defaultdict(int)
+        for name, own, _, _ in modules:
+            packages[name.split(".")[0]] += own
+        roots = sorted(
+            (module for module in modules if module[3] == 0),
+            key=lambda module: module[2],
+            reverse=True,
+        )
+
+        self.stdout.write("Пакеты (собственное время импорта, мс):")
+        for package, own in sorted(
+            packages.items(), key=lambda item: item[1], reverse=True
+        )[: options["limit"]]:
+            self.stdout.write(f"  {own / 1000:8.1f}  {package}")
+        self.stdout.write("Импорты верхнего уровня (с зависимостями, мс):")
+        for name, _, cumulative, _ in roots[: options["limit"]]:
+            self.stdout.write(f"  {cumulative / 1000:8.1f}  {name}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Модулей: {len(modules)}, "
+                f"импорт: {sum(module[1] for module in modules) / 1000:.1f} мс, "
+                f"запуск процесса: {elapsed * 1000:.0f} мс"
+            )
+        )
+
+    def parse(self, output):
+        for line in output.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            own, cumulative, name = line[len("import time:") :].split("|")
+            if not own.strip().isdigit():
+                continue
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            yield name.strip(), int(own), int(cumulative), depth
@@ -10,3 +10,9 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return request.method in permissions.SAFE_METHODS or obj.author == request.user
+
+
+class IsSelfOrAdmin(permissions.IsAuthenticated):
+
+    def has_object_permission(self, request, view, obj):
+        return obj == request.user or request.user.is_staff
@@ -0,0 +1,103 @@
+from contextlib import ExitStack
+from itertools import combinations
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from recipes.models import Ingredient, Recipe
+from .views import IngredientViewSet, RecipeViewSet, UserViewSet
+
+RECIPE_FILTERS = ("author", "is_favorited", "is_in_shopping_cart")
+
+
+def sample_values(user):
+    author_id = (
+        user.follower.values_list("author_id", flat=True).first()
+        or Recipe.objects.values_list("author_id", flat=True).first()
+    )
+    ingredient = Ingredient.objects.values_list("name", flat=True).first() or ""
+    return {
+        "author": author_id,
+        "is_favorited": 1,
+        "is_in_shopping_cart": 1,
+        "recipe": Recipe.objects.values_list("pk", flat=True).first(),
+        "ingredient": ingredient,
+        # Соседние буквы переставлены, как при опечатке.
+        "typo": ingredient[:1] + ingredient[2:3] + ingredient[1:2] + ingredient[3:],
+    }
+
+
+def endpoints(user):
+    values = sample_values(user)
+    catalog = []
+    for size in range(len(RECIPE_FILTERS) + 1):
+        for combination in combinations(RECIPE_FILTERS, size):
+            params = {name: values[name] for name in combination}
+            name = "recipes" + "".join(f"&{name}" for name in combination)
+            catalog.append(
+                (name.replace("&", "?", 1), RecipeViewSet, "list", params, {})
+            )
+    catalog += [
+        ("recipes?page=last", RecipeViewSet, "list", {"page": "last"}, {}),
+        ("recipe", RecipeViewSet, "retrieve", {}, {"pk": values["recipe"]}),
+        (
+            "ingredients?name=exact",
+            IngredientViewSet,
+            "list",
+            {"name": values["ingredient"]},
+            {},
+        ),
+        (
+            "ingredients?name=prefix",
+            IngredientViewSet,
+            "list",
+            {"name": values["ingredient"][:3]},
+            {},
+        ),
+        (
+            "ingredients?name=case-insensitive",
+            IngredientViewSet,
+            "list",
+            {"name": values["ingredient"][:3].upper()},
+            {},
+        ),
+        (
+            "ingredients?name=typo",
+            IngredientViewSet,
+            "list",
+            {"name": values["typo"]},
+            {},
+        ),
+        ("download_shopping_cart", RecipeViewSet, "download_shopping_cart", {}, {}),
+        ("subscriptions", UserViewSet, "subscriptions", {}, {}),
+        ("users", UserViewSet, "list", {}, {}),
+    ]
+    return catalog
+
+
+def run_endpoint(endpoint, user):
+    name, viewset, action, params, kwargs = endpoint
+    initkwargs = dict(getattr(getattr(viewset, action), "kwargs", {}))
+    initkwargs.update(detail=bool(kwargs), throttle_classes=())
+    view = viewset.as_view({"get": action}, **initkwargs)
+    request = APIRequestFactory().get("/", params)
+    force_authenticate(request, user=user)
+
+    with ExitStack() as stack:
+        captured = {
+            alias: stack.enter_context(CaptureQueriesContext(connections[alias]))
+            for alias in connections
+        }
+        response = view(request, **kwargs)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        else:
+            response.render()
+
+    queries = [
+        (alias, query["sql"], float(query["time"]))
+        for alias, context in captured.items()
+        for query in context.captured_queries
+    ]
+    return response.status_code, queries
@@ -1,18 +1,24 @@
-from django.db import transaction
+from django.db import models, transaction
 from django.conf import settings
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from rest_framework.validators import UniqueTogetherValidator
 from drf_extra_fields.fields import Base64ImageField
 
+from jobs.models import SUCCEEDED, Job
+from recipes.cart import sync_recipe_snapshots
+from recipes.scaling import scale_snapshot
 from recipes.models import (
     Favorite,
     Ingredient,
     Recipe,
     RecipeIngredient,
     ShoppingCart,
+    build_ingredients_snapshot,
 )
 from users.models import User
+from .context import get_viewer_context
 
 
 class ImageUrlField(serializers.ImageField):
@@ -27,6 +33,25 @@ class ImageUrlField(serializers.ImageField):
         return value.url
 
 
+class ViewerPrimingListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        instances = list(data)
+        self.child.prime_viewer(get_viewer_context(self.context), instances)
+        return super().to_representation(instances)
+
+
+class SparseFieldsMixin:
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
 class SignupSerializer(UserCreateSerializer):
 
     class Meta:
@@ -69,7 +94,7 @@ class SignupSerializer(UserCreateSerializer):
         return value
 
 
-class ProfileSerializer(UserSerializer):
+class ProfileSerializer(SparseFieldsMixin, UserSerializer):
 
     is_subscribed = serializers.SerializerMethodField()
 
@@ -84,12 +109,14 @@ class ProfileSerializer(UserSerializer):
             "is_subscribed",
             "avatar",
         )
+        list_serializer_class = ViewerPrimingListSerializer
 
     def get_is_subscribed(self, obj):
-        user = self.context.get("request").user
-        if user.is_anonymous:
-            return False
-        return user.follower.filter(author=obj).exists()
+        return get_viewer_context(self.context).is_subscribed(obj.id)
+
+    def prime_viewer(self, viewer, instances):
+        if "is_subscribed" in self.fields:
+            viewer.prime(author_ids=[user.id for user in instances])
 
 
 class SetAvatarSerializer(serializers.ModelSerializer):
@@ -113,17 +140,6 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit")
 
 
-class RecipeIngredientSerializer(serializers.ModelSerializer):
-
-    id = serializers.ReadOnlyField(source="ingredient.id")
-    name = serializers.ReadOnlyField(source="ingredient.name")
-    measurement_unit = serializers.ReadOnlyField(source="ingredient.measurement_unit")
-
-    class Meta:
-        model = RecipeIngredient
-        fields = ("id", "name", "measurement_unit", "amount")
-
-
 class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
 
     id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
@@ -141,12 +157,10 @@ class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
         return value
 
 
-class RecipeListSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     author = ProfileSerializer(read_only=True)
-    ingredients = RecipeIngredientSerializer(
-        source="recipe_ingredients", many=True, read_only=True
-    )
+    ingredients = serializers.ReadOnlyField(source="ingredients_snapshot")
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = ImageUrlField(read_only=True)
@@ -163,19 +177,41 @@ class RecipeListSerializer(serializers.ModelSerializer):
             "image",
             "text",
             "cooking_time",
+            "servings",
         )
+        list_serializer_class = ViewerPrimingListSerializer
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        servings = self.context.get("servings")
+        if servings is not None:
+            if "ingredients" in data:
+                data["ingredients"] = scale_snapshot(
+                    data["ingredients"], instance.servings, servings
+                )
+            if "servings" in data:
+                data["servings"] = servings
+        return data
 
     def get_is_favorited(self, obj):
-        user = self.context.get("request").user
-        if user.is_anonymous:
-            return False
-        return user.favorites.filter(recipe=obj).exists()
+        return get_viewer_context(self.context).is_favorited(obj.id)
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context.get("request").user
-        if user.is_anonymous:
-            return False
-        return user.shopping_cart.filter(recipe=obj).exists()
+        return get_viewer_context(self.context).is_in_shopping_cart(obj.id)
+
+    def prime_viewer(self, viewer, instances):
+        viewer.prime(
+            recipe_ids=(
+                [recipe.id for recipe in instances]
+                if {"is_favorited", "is_in_shopping_cart"} & set(self.fields)
+                else ()
+            ),
+            author_ids=(
+                [recipe.author_id for recipe in instances]
+                if "author" in self.fields
+                else ()
+            ),
+        )
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
@@ -194,6 +230,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             "image",
             "text",
             "cooking_time",
+            "servings",
         )
 
     def validate(self, data):
@@ -230,6 +267,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop("ingredients")
+        validated_data["ingredients_snapshot"] = self._build_snapshot(ingredients_data)
         recipe = Recipe.objects.create(**validated_data)
         self._create_recipe_ingredients(recipe, ingredients_data)
         return recipe
@@ -237,10 +275,15 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop("ingredients")
+        validated_data["ingredients_snapshot"] = self._build_snapshot(ingredients_data)
+        old_snapshot = instance.ingredients_snapshot
         instance.recipe_ingredients.all().delete()
         self._create_recipe_ingredients(instance, ingredients_data)
 
         instance = super().update(instance, validated_data)
+        sync_recipe_snapshots(
+            {instance.pk: (old_snapshot, instance.ingredients_snapshot)}
+        )
         return instance
 
     def _create_recipe_ingredients(self, recipe, ingredients_data):
@@ -255,6 +298,17 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             )
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
 
+    def _build_snapshot(self, ingredients_data):
+        return build_ingredients_snapshot(
+            (
+                ingredient_data["id"].id,
+                ingredient_data["id"].name,
+                ingredient_data["id"].measurement_unit,
+                ingredient_data["amount"],
+            )
+            for ingredient_data in ingredients_data
+        )
+
     def to_representation(self, instance):
         return RecipeListSerializer(instance, context=self.context).data
 
@@ -323,3 +377,35 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         return RecipeMinifiedSerializer(instance.recipe, context=self.context).data
+
+
+class JobSerializer(serializers.ModelSerializer):
+
+    result = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = (
+            "id",
+            "kind",
+            "status",
+            "priority",
+            "attempts",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "result",
+        )
+
+    def get_result(self, obj):
+        if obj.status != SUCCEEDED or not obj.result:
+            return None
+        result = dict(obj.result)
+        name = result.pop("file", None)
+        if name:
+            result["url"] = reverse(
+                "api:protected-media",
+                args=[name],
+                request=self.context.get("request"),
+            )
+        return result
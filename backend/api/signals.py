@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from foodgram import storage
+from foodgram.fragments import fragments, profile_keys
+from outbox.publisher import publish
+from users.models import Subscription, User
+from .authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, using=None, **kwargs):
+    # Повторный сброс после коммита убирает запись, которую параллельный
+    # запрос успел закешировать из ещё не изменённой строки.
+    key = instance.key
+    token_cache.invalidate(key)
+    transaction.on_commit(lambda: token_cache.invalidate(key), using=using)
+
+
+@receiver(post_save, sender=User)
+def forget_changed_user_tokens(sender, instance, using=None, **kwargs):
+    user_id = instance.pk
+    token_cache.invalidate_user(user_id, using=using)
+    transaction.on_commit(
+        lambda: token_cache.invalidate_user(user_id, using=using), using=using
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_profile_fragment(
+    sender, instance, raw=False, using=None, update_fields=None, **kwargs
+):
+    if not raw:
+        fragments.invalidate(profile_keys(instance.pk, update_fields), using=using)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_profile_fragment(sender, instance, using=None, **kwargs):
+    fragments.invalidate(profile_keys(instance.pk), using=using)
+
+
+@receiver(post_save, sender=Subscription)
+def publish_subscription_added(
+    sender, instance, created, raw=False, using=None, **kwargs
+):
+    if created and not raw:
+        publish(
+            "subscription.added",
+            using=using,
+            user_id=instance.user_id,
+            author_id=instance.author_id,
+        )
+
+
+@receiver(post_delete, sender=Subscription)
+def publish_subscription_removed(sender, instance, using=None, **kwargs):
+    publish(
+        "subscription.removed",
+        using=using,
+        user_id=instance.user_id,
+        author_id=instance.author_id,
+    )
+
+
+post_init.connect(storage.remember_stored_files, sender=User)
+post_save.connect(storage.release_replaced_files, sender=User)
+post_delete.connect(storage.release_deleted_files, sender=User)
@@ -0,0 +1,20 @@
+from django.core.files.base import ContentFile
+
+from foodgram.storage import protected_storage
+from jobs.registry import task
+from recipes import cart
+from recipes.scaling import parse_recipe_servings
+from .views import RecipeViewSet
+
+
+@task("shopping_list.export")
+def export_shopping_list(job):
+    targets = parse_recipe_servings(job.payload.get("servings", []))
+    content = "".join(
+        RecipeViewSet.render_shopping_list(cart.shopping_list(job.user, targets))
+    )
+    name = f"{job.user_id}/shopping-lists/{job.pk}.txt"
+    # При повторной попытке файл от прошлой мог остаться.
+    protected_storage.delete(name)
+    protected_storage.save(name, ContentFile(content.encode()))
+    return {"file": name, "filename": "shopping_list.txt"}
@@ -0,0 +1,131 @@
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from django.core.cache import caches
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+)
+from users.models import Subscription, User
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    for cache in caches.all():
+        cache.clear()
+    yield
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture
+def golden():
+    # UPDATE_GOLDEN=1 записывает недостающие эталоны ответом первого запроса;
+    # чтобы обновить эталон, его файл нужно удалить. Сериализаторный вариант
+    # в параметрах идёт первым, поэтому эталоном становится именно он.
+    def check(name, content):
+        path = GOLDEN_DIR / f"{name}.json"
+        if os.getenv("UPDATE_GOLDEN") == "1" and not path.exists():
+            path.write_bytes(content)
+        assert path.exists(), f"Нет эталона {path.name}, запустите с UPDATE_GOLDEN=1"
+        assert content == path.read_bytes(), f"Ответ отличается от эталона {path.name}"
+
+    return check
+
+
+def make_user(username, **extra):
+    return User.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="pass12345!",
+        first_name=username.capitalize(),
+        last_name="Тестов",
+        **extra,
+    )
+
+
+def make_recipe(author, name, ingredients, published, **extra):
+    extra.setdefault("text", f"{name}: готовить с душой")
+    recipe = Recipe.objects.create(author=author, name=name, **extra)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=amount)
+        for ingredient, amount in ingredients
+    )
+    recipe.refresh_ingredients_snapshot()
+    # Порядок ленты зависит от даты публикации, в эталонах она фиксирована.
+    Recipe.objects.filter(pk=recipe.pk).update(pub_date=published)
+    return recipe
+
+
+@pytest.fixture
+def catalog():
+    viewer = make_user("viewer")
+    anna = make_user("anna")
+    boris = make_user("boris")
+    flour, milk, egg = (
+        Ingredient.objects.create(name=name, measurement_unit=unit)
+        for name, unit in (
+            ("мука пшеничная", "г"),
+            ("молоко", "мл"),
+            ("яйцо «С0»", "шт."),
+        )
+    )
+    published = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    pancakes = make_recipe(
+        anna,
+        "Блины",
+        [(flour, 200), (milk, 500), (egg, 3)],
+        published,
+        cooking_time=40,
+    )
+    omelette = make_recipe(
+        anna,
+        "Омлет на завтрак",
+        [(milk, 50), (egg, 2)],
+        published + timedelta(days=1),
+        cooking_time=7,
+        servings=1,
+        # U+2028 рендереры обязаны экранировать одинаково.
+        text="Взбить\u2028и жарить",
+    )
+    porridge = make_recipe(
+        boris,
+        'Каша "Дружба"',
+        [(flour, 30), (milk, 333)],
+        published + timedelta(days=2),
+        cooking_time=25,
+        servings=4,
+    )
+    Favorite.objects.create(user=viewer, recipe=pancakes)
+    Favorite.objects.create(user=viewer, recipe=porridge)
+    Favorite.objects.create(user=boris, recipe=omelette)
+    ShoppingCart.objects.create(user=viewer, recipe=omelette)
+    ShoppingCart.objects.create(user=viewer, recipe=porridge)
+    Subscription.objects.create(user=viewer, author=anna)
+    Subscription.objects.create(user=viewer, author=boris)
+    Subscription.objects.create(user=anna, author=boris)
+    return {
+        "viewer": viewer,
+        "anna": anna,
+        "boris": boris,
+        "pancakes": pancakes,
+        "omelette": omelette,
+        "porridge": porridge,
+    }
+
+
+@pytest.fixture
+def viewer_client(catalog):
+    client = APIClient()
+    client.force_authenticate(catalog["viewer"])
+    return client
@@ -0,0 +1,63 @@
+import pytest
+from django.core.cache import caches
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+from recipes.deletion import delete_user
+from users.models import User
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(
+        username="reader",
+        email="reader@example.com",
+        password="pass12345!",
+        first_name="Reader",
+        last_name="Reader",
+    )
+
+
+@pytest.fixture
+def token(user):
+    return Token.objects.create(user=user)
+
+
+@pytest.fixture
+def client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    assert client.get("/api/users/me/").status_code == 200
+    return client
+
+
+def cached(token):
+    # Запись лежит в общем кеше, который видят все воркеры.
+    return caches["default"].get(token_cache._key(token.key))
+
+
+def test_token_is_cached_in_shared_cache(client, token, user):
+    assert cached(token)[0].pk == user.pk
+    assert all(token.key not in key for key in caches["default"]._cache)
+
+
+def test_logout_revokes_token(client, token):
+    assert client.post("/api/auth/token/logout/").status_code == 204
+    assert cached(token) is None
+    assert client.get("/api/users/me/").status_code == 401
+
+
+def test_deactivation_revokes_token(client, token, user):
+    user.is_active = False
+    user.save()
+    assert cached(token) is None
+    assert client.get("/api/users/me/").status_code == 401
+
+
+def test_deleted_user_token_is_revoked(client, token, user):
+    delete_user(user)
+    assert cached(token) is None
+    assert client.get("/api/users/me/").status_code == 401
@@ -0,0 +1,30 @@
+import pytest
+from django.db import transaction
+
+from foodgram.fragments import FragmentStore
+from recipes.models import Recipe
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def store(settings):
+    return FragmentStore(settings.FRAGMENT_CACHE_ALIAS)
+
+
+def test_fragments_load_from_primary(settings, store):
+    settings.DATABASE_REPLICAS = ["replica"]
+    loaded = store.get_many(["key"], lambda missing: {"key": Recipe.objects.all().db})
+    assert loaded == {"key": "default"}
+
+
+def test_value_read_before_commit_is_not_cached(store):
+    stale = store.get_many(["key"], lambda missing: {"key": "old"})
+    assert stale == {"key": "old"}
+
+    with transaction.atomic():
+        store.invalidate(["key"])
+    # Запрос, прочитавший строку до коммита, пытается вернуть её в кеш.
+    assert store.get_many(["key"], lambda missing: {"key": "old"}) == {"key": "old"}
+
+    assert store.get_many(["key"], lambda missing: {"key": "new"}) == {"key": "new"}
@@ -0,0 +1,54 @@
+import hashlib
+import os
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+
+from recipes.models import Recipe
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def save_with_siblings(content):
+    name = default_storage.save("recipes/images/photo.png", ContentFile(content))
+    for suffix in (".gz", ".br"):
+        with open(default_storage.path(name + suffix), "wb") as file:
+            file.write(b"compressed")
+    return name
+
+
+def test_collect_media_garbage_removes_precompressed_siblings():
+    author = User.objects.create_user(
+        username="author",
+        email="author@example.com",
+        password="pass12345!",
+        first_name="Author",
+        last_name="Author",
+    )
+    used = save_with_siblings(b"used image")
+    orphaned = save_with_siblings(b"orphaned image")
+    digest = hashlib.sha256(b"gone").hexdigest()
+    stale_copy = f"recipes/images/{digest[:2]}/{digest}.png.gz"
+    os.makedirs(os.path.dirname(default_storage.path(stale_copy)))
+    with open(default_storage.path(stale_copy), "wb") as file:
+        file.write(b"compressed")
+    Recipe.objects.create(
+        author=author, name="Фото", text="-", cooking_time=1, image=used
+    )
+
+    call_command("collect_media_garbage", grace=0)
+
+    for suffix in ("", ".gz", ".br"):
+        assert default_storage.exists(used + suffix)
+        assert not default_storage.exists(orphaned + suffix)
+    assert not default_storage.exists(stale_copy)
+
+
+def test_deleting_a_file_removes_its_siblings():
+    name = save_with_siblings(b"image")
+    default_storage.delete(name)
+    for suffix in ("", ".gz", ".br"):
+        assert not default_storage.exists(name + suffix)
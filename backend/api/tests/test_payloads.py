@@ -0,0 +1,94 @@
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db.models import QuerySet
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from api import async_views
+
+pytestmark = pytest.mark.django_db(transaction=True, reset_sequences=True)
+
+RECIPE_LISTS = {
+    "recipes": "",
+    "recipes_sparse": "?fields=id,name,is_favorited,is_in_shopping_cart",
+    "recipes_omit": "?omit=author,ingredients,text",
+    "recipes_favorited": "?is_favorited=1",
+    "recipes_in_cart": "?is_in_shopping_cart=1",
+    "recipes_page": "?limit=2&page=2",
+}
+
+USER_LISTS = {
+    "users": "",
+    "users_sparse": "?fields=id,username,is_subscribed",
+}
+
+SUBSCRIPTIONS = {
+    "subscriptions": "",
+    "subscriptions_limited": "?recipes_limit=1",
+    "subscriptions_sparse": "?fields=id,recipes_count,recipes",
+}
+
+
+def get(client, path):
+    response = client.get(path)
+    assert response.status_code == 200, response.content
+    # Быстрый рендерер обязан давать те же байты, что и стандартный.
+    assert response.content == JSONRenderer().render(response.data)
+    return response.content
+
+
+@pytest.mark.parametrize("flat_reads", (False, True), ids=("serializer", "flat"))
+@pytest.mark.parametrize("name", RECIPE_LISTS)
+def test_recipe_list(viewer_client, golden, name, flat_reads):
+    with override_settings(FLAT_LIST_READS=flat_reads):
+        golden(name, get(viewer_client, f"/api/recipes/{RECIPE_LISTS[name]}"))
+
+
+@pytest.mark.parametrize("flat_reads", (False, True), ids=("serializer", "flat"))
+def test_anonymous_recipe_list(catalog, golden, flat_reads):
+    with override_settings(FLAT_LIST_READS=flat_reads):
+        golden("recipes_anonymous", get(APIClient(), "/api/recipes/"))
+
+
+@pytest.mark.parametrize("flat_reads", (False, True), ids=("serializer", "flat"))
+@pytest.mark.parametrize("name", USER_LISTS)
+def test_user_list(viewer_client, golden, name, flat_reads):
+    with override_settings(FLAT_LIST_READS=flat_reads):
+        golden(name, get(viewer_client, f"/api/users/{USER_LISTS[name]}"))
+
+
+@pytest.mark.parametrize("name", SUBSCRIPTIONS)
+def test_subscriptions(viewer_client, golden, name):
+    golden(name, get(viewer_client, f"/api/users/subscriptions/{SUBSCRIPTIONS[name]}"))
+
+
+@pytest.mark.parametrize("fragment_cache", (False, True), ids=("serializer", "cache"))
+@pytest.mark.parametrize(
+    "name, query",
+    (
+        ("recipe_detail", ""),
+        ("recipe_detail_servings", "?servings=6"),
+        ("recipe_detail_sparse", "?fields=id,ingredients,servings&servings=2"),
+    ),
+)
+def test_recipe_detail(catalog, viewer_client, golden, name, query, fragment_cache):
+    path = f"/api/recipes/{catalog['porridge'].pk}/{query}"
+    with override_settings(RECIPE_FRAGMENT_CACHE=fragment_cache):
+        # Второй запрос собирается из закэшированных фрагментов.
+        for _ in range(2):
+            golden(name, get(viewer_client, path))
+
+
+@pytest.mark.parametrize("flat_reads", (False, True), ids=("serializer", "flat"))
+def test_async_last_page_counts_once(catalog, golden, flat_reads):
+    request = APIRequestFactory().get("/api/recipes/", {"limit": 2, "page": "last"})
+    force_authenticate(request, catalog["viewer"])
+    with override_settings(FLAT_LIST_READS=flat_reads), mock.patch.object(
+        QuerySet, "count", autospec=True, side_effect=QuerySet.count
+    ) as count:
+        response = async_to_sync(async_views.recipe_list)(request)
+    assert count.call_count == 1
+    golden("recipes_page", response.render().content)
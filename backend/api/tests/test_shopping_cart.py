@@ -0,0 +1,113 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+
+from jobs.worker import run_pending
+from recipes import cart
+from recipes.deletion import delete_recipe, delete_user
+from recipes.models import (
+    CartIngredientTotal,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    UnitConversion,
+)
+from users.models import Subscription
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture(autouse=True)
+def locking_backend(monkeypatch):
+    # SQLite не умеет SELECT ... FOR UPDATE, и Django не проверяет, что
+    # блокировка идёт в транзакции. Включаем проверку, не меняя сам SQL.
+    monkeypatch.setattr(connection.features, "has_select_for_update", True)
+    monkeypatch.setattr(connection.features, "has_select_for_update_skip_locked", True)
+    monkeypatch.setattr(connection.ops, "for_update_sql", lambda **kwargs: "")
+
+
+def totals(user):
+    return {
+        (name, unit): amount
+        for name, unit, amount in user.cart_totals.values_list(
+            "name", "measurement_unit", "amount"
+        )
+    }
+
+
+def test_add_to_cart_updates_totals(catalog, viewer_client):
+    recipe = catalog["pancakes"]
+    response = viewer_client.post(f"/api/recipes/{recipe.pk}/shopping_cart/")
+    assert response.status_code == 201
+    # Два яйца уже лежат в корзине вместе с омлетом.
+    assert totals(catalog["viewer"])[("яйцо «С0»", "шт.")] == 5
+
+
+def test_cart_row_is_rolled_back_with_totals(catalog, viewer_client, monkeypatch):
+    def fail(user_ids, deltas):
+        raise RuntimeError
+
+    monkeypatch.setattr(cart, "apply_deltas", fail)
+    recipe = catalog["pancakes"]
+    with pytest.raises(RuntimeError):
+        viewer_client.post(f"/api/recipes/{recipe.pk}/shopping_cart/")
+    assert not catalog["viewer"].shopping_cart.filter(recipe=recipe).exists()
+
+
+def test_snapshot_rebuild_updates_totals(catalog):
+    RecipeIngredient.objects.filter(recipe=catalog["omelette"]).update(amount=4)
+    Recipe.objects.all().rebuild_ingredients_snapshots()
+    assert (
+        CartIngredientTotal.objects.get(user=catalog["viewer"], name="яйцо «С0»").amount
+        == 4
+    )
+
+
+def download(client):
+    response = client.get("/api/recipes/download_shopping_cart/")
+    assert response.status_code == 200
+    return b"".join(response.streaming_content).decode()
+
+
+def test_deleted_recipe_leaves_other_carts(catalog, viewer_client):
+    # Омлет Анны лежит в корзине у зрителя: яйца есть только в нём.
+    assert "яйцо" in download(viewer_client)
+    delete_recipe(catalog["omelette"])
+    shopping_list = download(viewer_client)
+    assert "яйцо" not in shopping_list
+    assert "молоко (мл) — 333" in shopping_list
+
+    run_pending()
+    assert download(viewer_client) == shopping_list
+    assert not ShoppingCart.all_objects.filter(recipe=catalog["omelette"]).exists()
+
+
+def test_deleted_author_links_are_hidden(catalog):
+    viewer, anna = catalog["viewer"], catalog["anna"]
+    delete_user(anna)
+    assert not Subscription.objects.filter(author=anna).exists()
+    assert not viewer.favorites.filter(recipe=catalog["pancakes"]).exists()
+    assert not viewer.shopping_cart.filter(recipe=catalog["omelette"]).exists()
+    assert Subscription.all_objects.filter(author=anna).count() == 1
+    assert set(viewer.cart_totals.values_list("name", flat=True)) == {
+        "мука пшеничная",
+        "молоко",
+    }
+
+
+def test_servings_override_in_one_aggregate(catalog, django_assert_num_queries):
+    UnitConversion.objects.create(unit="мл", canonical_unit="г", factor=Decimal(1))
+    targets = {
+        catalog["omelette"].pk: 3,
+        catalog["porridge"].pk: 6,
+        # Рецепта нет в корзине: поправка к нему не применяется.
+        catalog["pancakes"].pk: 2,
+    }
+    with django_assert_num_queries(3):
+        items = cart.shopping_list(catalog["viewer"], targets)
+    assert sorted(items) == [
+        ("молоко", "г", 650),
+        ("мука пшеничная", "г", 45),
+        ("яйцо «С0»", "шт.", 6),
+    ]
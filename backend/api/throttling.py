@@ -0,0 +1,130 @@
+import logging
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+logger = logging.getLogger("foodgram.throttling")
+
+
+class SQLiteBucketStore:
+
+    purge_probability = 0.001
+    purge_age = 24 * 60 * 60
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def consume(self, key, capacity, refill_rate):
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, row[0] + max(now - row[1], 0) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            connection.execute(
+                "INSERT INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (key, tokens, now),
+            )
+            if random.random() < self.purge_probability:
+                connection.execute(
+                    "DELETE FROM buckets WHERE updated_at < ?", (now - self.purge_age,)
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return allowed, tokens
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+
+class ActionTokenBucketThrottle(SimpleRateThrottle):
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+    _store = None
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    @classmethod
+    def get_store(cls):
+        if cls._store is None:
+            cls._store = SQLiteBucketStore(settings.THROTTLE_STORE_PATH)
+        return cls._store
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, "throttle_scopes", {}).get(
+            getattr(view, "action", None)
+        )
+        if self.scope is None or self.scope not in self.THROTTLE_RATES:
+            return True
+
+        num_requests, duration = self.parse_rate(self.THROTTLE_RATES[self.scope])
+        refill_rate = num_requests / duration
+        try:
+            allowed, tokens = self.get_store().consume(
+                self.get_cache_key(request, view), num_requests, refill_rate
+            )
+        except sqlite3.Error:
+            logger.exception("Хранилище ограничений запросов недоступно")
+            return True
+
+        request.rate_limit = {
+            "limit": num_requests,
+            "remaining": int(tokens),
+            "reset": math.ceil((num_requests - tokens) / refill_rate),
+        }
+        if not allowed:
+            self.wait_seconds = (1 - tokens) / refill_rate
+        return allowed
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class RateLimitHeadersMixin:
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        rate_limit = getattr(request, "rate_limit", None)
+        if rate_limit is not None:
+            response["X-RateLimit-Limit"] = rate_limit["limit"]
+            response["X-RateLimit-Remaining"] = rate_limit["remaining"]
+            response["X-RateLimit-Reset"] = rate_limit["reset"]
+        return response
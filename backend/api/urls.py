@@ -1,7 +1,14 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import IngredientViewSet, RecipeViewSet, UserViewSet
+from .views import (
+    IngredientViewSet,
+    JobViewSet,
+    ProtectedMediaView,
+    RecipeViewSet,
+    UserViewSet,
+)
 
 app_name = "api"
 
@@ -9,8 +16,20 @@ router = DefaultRouter()
 router.register("ingredients", IngredientViewSet, basename="ingredients")
 router.register("recipes", RecipeViewSet, basename="recipes")
 router.register("users", UserViewSet, basename="users")
+router.register("jobs", JobViewSet, basename="jobs")
 
 urlpatterns = [
     path("auth/", include("djoser.urls.authtoken")),
+    path("media/<path:path>", ProtectedMediaView.as_view(), name="protected-media"),
     path("", include(router.urls)),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views
+
+    urlpatterns = [
+        path("ingredients/", async_views.ingredient_list),
+        path("recipes/", async_views.recipe_list),
+        path("recipes/<int:pk>/", async_views.recipe_detail),
+        path("users/subscriptions/", async_views.subscriptions),
+    ] + urlpatterns
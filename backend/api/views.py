@@ -1,29 +1,50 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-
-from recipes.models import Ingredient, Recipe, RecipeIngredient
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+
+from foodgram.storage import protected_media_response
+from jobs.models import FINISHED, HIGH_PRIORITY, Job
+from jobs.queue import enqueue
+from recipes import cart, deletion, shortlinks
+from recipes.models import Ingredient, Recipe
+from recipes.scaling import (
+    InvalidServings,
+    as_number,
+    parse_recipe_servings,
+    parse_servings,
+)
 from users.models import User
+from . import flat, fragments
+from .context import ViewerContextMixin
+from .fieldsets import SparseFieldsetMixin
 from .filters import IngredientFilter, RecipeFilter
 from .pagination import RecipePagination
-from .permissions import IsAuthorOrReadOnly
+from .permissions import IsAuthorOrReadOnly, IsSelfOrAdmin
 from .serializers import (
     ProfileSerializer,
     IngredientSerializer,
+    JobSerializer,
     RecipeCreateSerializer,
     RecipeListSerializer,
     RecipeMinifiedSerializer,
     SetAvatarSerializer,
+    SignupSerializer,
     UserWithRecipesSerializer,
 )
+from .throttling import RateLimitHeadersMixin
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(RateLimitHeadersMixin, viewsets.ReadOnlyModelViewSet):
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
@@ -31,9 +52,15 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
     pagination_class = None
+    throttle_scopes = {"list": "search"}
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    RateLimitHeadersMixin,
+    SparseFieldsetMixin,
+    ViewerContextMixin,
+    viewsets.ModelViewSet,
+):
 
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthorOrReadOnly,)
@@ -41,24 +68,107 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     http_method_names = ["get", "post", "patch", "delete"]
+    throttle_scopes = {
+        "create": "uploads",
+        "partial_update": "uploads",
+        "destroy": "writes",
+        "favorite": "writes",
+        "delete_favorite": "writes",
+        "shopping_cart": "writes",
+        "delete_shopping_cart": "writes",
+        "download_shopping_cart": "downloads",
+        "export_shopping_cart": "downloads",
+    }
 
     def get_serializer_class(self):
         if self.action in ("create", "update", "partial_update"):
             return RecipeCreateSerializer
         return RecipeListSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in self.sparse_fieldset_actions:
+            return queryset
+        fields = self.get_sparse_fields() or RecipeListSerializer.Meta.fields
+        if "author" in fields:
+            queryset = queryset.select_related("author")
+        deferred = [
+            column
+            for field, column in (
+                ("text", "text"),
+                ("ingredients", "ingredients_snapshot"),
+            )
+            if field not in fields
+        ]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        servings = self.request.query_params.get("servings")
+        if self.action == "retrieve" and servings is not None:
+            try:
+                context["servings"] = parse_servings(servings)
+            except InvalidServings as e:
+                raise ValidationError({"servings": [str(e)]})
+        return context
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.get_detail_data())
+
+    def get_detail_data(self):
+        if not settings.RECIPE_FRAGMENT_CACHE:
+            return self.get_serializer(self.get_object()).data
+        try:
+            recipe_id = int(self.kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404
+        data = fragments.recipe_detail(
+            recipe_id,
+            self.request,
+            self.viewer_context,
+            self.get_sparse_fields(),
+            self.get_serializer_context().get("servings"),
+        )
+        if data is None:
+            raise Http404
+        return data
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FLAT_LIST_READS:
+            return super().list(request, *args, **kwargs)
+
+        fields = self.get_sparse_fields()
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *flat.recipe_columns(fields)
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                flat.recipes(page, request, self.viewer_context, fields)
+            )
+        return Response(
+            flat.recipes(list(queryset), request, self.viewer_context, fields)
+        )
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def perform_destroy(self, instance):
+        deletion.delete_recipe(instance)
+
     @action(
         detail=True, methods=["get"], permission_classes=[AllowAny], url_path="get-link"
     )
     def get_link(self, request, pk=None):
         try:
-            recipe = get_object_or_404(Recipe, pk=pk)
+            if not shortlinks.recipe_exists(int(pk)):
+                raise Http404
             host = request.get_host()
             protocol = "https" if request.is_secure() else "http"
-            return Response({"short-link": f"{protocol}://{host}/s/{recipe.id}"})
+            code = shortlinks.encode(int(pk))
+            return Response({"short-link": f"{protocol}://{host}/s/{code}"})
         except ValueError:
             return Response(
                 {"errors": "Неверный формат идентификатора рецепта"},
@@ -66,6 +176,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    @transaction.atomic
     def favorite(self, request, pk=None):
         try:
             recipe = get_object_or_404(Recipe, pk=pk)
@@ -108,6 +219,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    @transaction.atomic
     def shopping_cart(self, request, pk=None):
         try:
             recipe = get_object_or_404(Recipe, pk=pk)
@@ -151,47 +263,99 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
     def download_shopping_cart(self, request):
-        user = request.user
-        ingredients = (
-            RecipeIngredient.objects.filter(recipe__shopping_cart__user=user)
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(total_amount=Sum("amount"))
-            .order_by("ingredient__name")
-        )
-
-        shopping_list = []
-        shopping_list.append("============= СПИСОК ПОКУПОК =============")
-        shopping_list.append("")
-
-        for index, item in enumerate(ingredients, start=1):
-            name = item["ingredient__name"]
-            unit = item["ingredient__measurement_unit"]
-            amount = item["total_amount"]
-            shopping_list.append(f"{index}. {name} ({unit}) — {amount}")
-
-        shopping_list.append("")
-        shopping_list.append("========= ПРИЯТНОГО ПРИГОТОВЛЕНИЯ! =========")
+        try:
+            targets = parse_recipe_servings(request.query_params.getlist("servings"))
+        except InvalidServings as e:
+            return Response({"servings": [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
 
-        response = HttpResponse(
-            "\n".join(shopping_list), content_type="text/plain; charset=utf-8"
+        response = StreamingHttpResponse(
+            self.render_shopping_list(cart.shopping_list(request.user, targets)),
+            content_type="text/plain; charset=utf-8",
         )
         response["Content-Disposition"] = 'attachment; filename="shopping_list.txt"'
         return response
 
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    def export_shopping_cart(self, request):
+        servings = request.query_params.getlist("servings")
+        try:
+            parse_recipe_servings(servings)
+        except InvalidServings as e:
+            return Response({"servings": [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = enqueue(
+            "shopping_list.export",
+            user=request.user,
+            priority=HIGH_PRIORITY,
+            servings=servings,
+        )
+        # В режиме JOBS_EAGER задача уже выполнена.
+        job.refresh_from_db()
+        serializer = JobSerializer(job, context=self.get_serializer_context())
+        return Response(
+            serializer.data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={
+                "Location": reverse("api:jobs-detail", args=[job.pk], request=request)
+            },
+        )
 
-class UserViewSet(viewsets.ModelViewSet):
+    @staticmethod
+    def render_shopping_list(items, chunk_size=100):
+        lines = ["============= СПИСОК ПОКУПОК =============", ""]
+        for index, (name, unit, amount) in enumerate(items, start=1):
+            lines.append(f"{index}. {name} ({unit}) — {as_number(amount)}")
+            if len(lines) >= chunk_size:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        lines.append("")
+        lines.append("========= ПРИЯТНОГО ПРИГОТОВЛЕНИЯ! =========")
+        yield "\n".join(lines)
+
+
+class UserViewSet(
+    RateLimitHeadersMixin,
+    SparseFieldsetMixin,
+    ViewerContextMixin,
+    viewsets.ModelViewSet,
+):
 
     queryset = User.objects.all()
     pagination_class = RecipePagination
     http_method_names = ["get", "post", "delete", "put"]
+    sparse_fieldset_actions = ("list", "retrieve", "me", "subscriptions")
+    throttle_scopes = {
+        "create": "signup",
+        "destroy": "writes",
+        "subscribe": "writes",
+        "unsubscribe": "writes",
+        "me_avatar": "uploads",
+        "delete_avatar": "writes",
+        "set_password": "writes",
+    }
 
     def get_serializer_class(self):
         if self.action == "create":
-            from djoser.serializers import UserCreateSerializer
-
-            return UserCreateSerializer
+            return SignupSerializer
         return ProfileSerializer
 
+    def list(self, request, *args, **kwargs):
+        if not settings.FLAT_LIST_READS:
+            return super().list(request, *args, **kwargs)
+
+        fields = self.get_sparse_fields()
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *flat.PROFILE_FIELDS
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                flat.profiles(page, request, self.viewer_context, fields)
+            )
+        return Response(
+            flat.profiles(list(queryset), request, self.viewer_context, fields)
+        )
+
     def get_permissions(self):
         if self.action == "create":
             return [AllowAny()]
@@ -205,32 +369,41 @@ class UserViewSet(viewsets.ModelViewSet):
             "set_password",
         ]:
             return [IsAuthenticated()]
+        if self.action == "destroy":
+            return [IsSelfOrAdmin()]
         return [AllowAny()]
 
+    def perform_destroy(self, instance):
+        deletion.delete_user(instance)
+
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
     def me(self, request):
-        serializer = ProfileSerializer(request.user, context={"request": request})
+        serializer = ProfileSerializer(
+            request.user,
+            context=self.get_serializer_context(),
+            fields=self.get_sparse_fields(),
+        )
         return Response(serializer.data)
 
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
-        subscriptions = User.objects.filter(following__user=request.user)
+        subscriptions = self.get_subscriptions_queryset()
         page = self.paginate_queryset(subscriptions)
 
         if page is not None:
-            serializer = UserWithRecipesSerializer(
-                page, many=True, context={"request": request}
-            )
-            data = serializer.data
-            for user in data:
-                if "recipes" in user:
-                    for recipe in user["recipes"]:
-                        if recipe.get("image") is None:
-                            recipe["image"] = ""
-            return self.get_paginated_response(data)
+            return self.get_paginated_response(self.get_subscriptions_data(page))
+
+        return Response(self.get_subscriptions_data(subscriptions))
 
+    def get_subscriptions_queryset(self):
+        return User.objects.filter(following__user=self.request.user)
+
+    def get_subscriptions_data(self, users):
         serializer = UserWithRecipesSerializer(
-            subscriptions, many=True, context={"request": request}
+            users,
+            many=True,
+            context=self.get_serializer_context(),
+            fields=self.get_sparse_fields(UserWithRecipesSerializer),
         )
         data = serializer.data
         for user in data:
@@ -238,9 +411,10 @@ class UserViewSet(viewsets.ModelViewSet):
                 for recipe in user["recipes"]:
                     if recipe.get("image") is None:
                         recipe["image"] = ""
-        return Response(data)
+        return data
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    @transaction.atomic
     def subscribe(self, request, pk=None):
         try:
             author = get_object_or_404(User, pk=pk)
@@ -259,7 +433,9 @@ class UserViewSet(viewsets.ModelViewSet):
                 )
 
             user.follower.create(author=author)
-            serializer = UserWithRecipesSerializer(author, context={"request": request})
+            serializer = UserWithRecipesSerializer(
+                author, context=self.get_serializer_context()
+            )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except ValueError:
             return Response(
@@ -310,9 +486,8 @@ class UserViewSet(viewsets.ModelViewSet):
     def delete_avatar(self, request):
         user = request.user
         if user.avatar:
-            user.avatar.delete()
             user.avatar = None
-            user.save()
+            user.save(update_fields=["avatar"])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -341,3 +516,35 @@ class UserViewSet(viewsets.ModelViewSet):
         user.set_password(new_password)
         user.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class JobViewSet(RateLimitHeadersMixin, viewsets.ReadOnlyModelViewSet):
+
+    serializer_class = JobSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if response.data["status"] not in FINISHED:
+            response["Retry-After"] = str(settings.JOBS_POLL_HINT)
+        return response
+
+
+class ProtectedMediaView(APIView):
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, path):
+        owner_id = path.split("/", 1)[0]
+        if owner_id != str(request.user.pk) and not request.user.is_staff:
+            raise Http404
+        try:
+            response = protected_media_response(path)
+        except SuspiciousFileOperation:
+            raise Http404
+        if response is None:
+            raise Http404
+        return response
@@ -0,0 +1,146 @@
+import json
+import re
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+ID_RANGE_RE = re.compile(r"\s*(\d*)\s*(?:-\s*(\d*)\s*)?")
+
+
+def estimated_row_count(model, using):
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def estimated_query_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= limit:
+                return estimate
+        count = (
+            queryset.model._base_manager.using(queryset.db)
+            .filter(pk__in=queryset.order_by().values("pk")[:limit])
+            .count()
+        )
+        if count < limit:
+            return count
+        # Под фильтр попало больше предела: обрезать счёт нельзя, иначе
+        # дальние страницы недоступны. Берётся оценка планировщика, а если
+        # её нет или она ниже предела — точный count().
+        estimate = estimated_query_count(queryset)
+        if estimate is not None and estimate > limit:
+            return estimate
+        return queryset.count()
+
+
+class LargeTableAdminMixin:
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class SoftDeleteAdminMixin:
+    # Объект скрывается сразу, а зависимые строки удаляет фоновая задача.
+    # Страница подтверждения не собирает каскад: у крупного аккаунта он
+    # занимает сотни тысяч строк.
+
+    soft_delete_function = None
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        return (
+            [str(obj) for obj in objs],
+            {self.model._meta.verbose_name_plural: len(objs)},
+            set(),
+            [],
+        )
+
+    def delete_model(self, request, obj):
+        self.soft_delete_function(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.soft_delete_function(obj)
+
+
+class IdRangeFilter(admin.SimpleListFilter):
+
+    template = "admin/id_range_filter.html"
+    field_name = None
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def choices(self, changelist):
+        yield {
+            "value": self.value() or "",
+            "hidden_params": [
+                (name, value)
+                for name, value in changelist.params.items()
+                if name not in (self.parameter_name, "p")
+            ],
+            "reset_url": changelist.get_query_string(remove=[self.parameter_name]),
+        }
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        match = ID_RANGE_RE.fullmatch(value)
+        if match is None or not any(match.groups()):
+            raise IncorrectLookupParameters(value)
+        start, end = match.groups()
+        if end is None:
+            return queryset.filter(**{self.field_name: int(start)})
+        if start:
+            queryset = queryset.filter(**{f"{self.field_name}__gte": int(start)})
+        if end:
+            queryset = queryset.filter(**{f"{self.field_name}__lte": int(end)})
+        return queryset
+
+
+def id_range_filter(field_name, title):
+    return type(
+        f"{field_name.title()}IdRangeFilter",
+        (IdRangeFilter,),
+        {
+            "title": title,
+            "parameter_name": f"{field_name}_ids",
+            "field_name": f"{field_name}_id",
+        },
+    )
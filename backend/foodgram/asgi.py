@@ -1,7 +1,13 @@
 import os
 
 from django.core.asgi import get_asgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "foodgram.settings")
 
 application = get_asgi_application()
+
+# Представления, сериализаторы и админка импортируются при загрузке URLconf.
+# Делаем это сразу, чтобы gunicorn --preload выполнил импорт один раз в
+# мастер-процессе, а воркеры получили готовые модули через fork.
+get_resolver().url_patterns
@@ -0,0 +1,102 @@
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Сжатые копии, которые precompress_assets кладёт рядом с исходным файлом.
+PRECOMPRESSED_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli else ("gzip",)
+
+
+def accepted_encoding(header):
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    best = None
+    for coding in available_encodings():
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (coding, quality)
+    return best and best[0]
+
+
+def compress(data, encoding, level=None):
+    if encoding == "br":
+        return brotli.compress(
+            data,
+            quality=settings.COMPRESSION_BROTLI_QUALITY if level is None else level,
+        )
+    return gzip.compress(
+        data, compresslevel=settings.COMPRESSION_GZIP_LEVEL if level is None else level
+    )
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+    for item in sequence:
+        chunk = compressor.process(item) + compressor.flush()
+        if chunk:
+            yield chunk
+    yield compressor.finish()
+
+
+def compress_stream(sequence, encoding):
+    if encoding == "br":
+        return _brotli_sequence(sequence)
+    return compress_sequence(sequence)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if content_type not in settings.COMPRESSION_CONTENT_TYPES:
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = accepted_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response["Content-Length"]
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
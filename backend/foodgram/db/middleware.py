@@ -0,0 +1,32 @@
+from django.conf import settings
+
+from .routers import use_primary
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class PrimaryPinningMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        writes = request.method not in SAFE_METHODS
+        if not writes and settings.REPLICA_PIN_COOKIE not in request.COOKIES:
+            return self.get_response(request)
+
+        with use_primary():
+            response = self.get_response(request)
+
+        if writes and response.status_code < 500:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,266 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+logger = logging.getLogger("foodgram.db.pool")
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+
+    def __init__(
+        self,
+        name,
+        max_size=10,
+        timeout=5.0,
+        max_idle=300.0,
+        max_lifetime=3600.0,
+        check_after=30.0,
+        slow_wait=0.1,
+    ):
+        self.name = name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self.slow_wait = slow_wait
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            "acquired": 0,
+            "created": 0,
+            "discarded": 0,
+            "waited": 0,
+            "timeouts": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+
+    def acquire(self, connect, ping):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            with self._condition:
+                idle = self._take_idle()
+                if idle is None:
+                    if self._size >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise PoolTimeout(
+                                f"Не удалось получить соединение из пула "
+                                f"{self.name} за {self.timeout} с"
+                            )
+                        self._condition.wait(remaining)
+                        continue
+                    self._size += 1
+
+            if idle is None:
+                return self._create(connect, started)
+
+            connection, released_at = idle
+            if time.monotonic() - released_at > self.check_after and not ping(
+                connection
+            ):
+                with self._condition:
+                    self._discard(connection)
+                    self._condition.notify()
+                continue
+
+            with self._condition:
+                self._record_wait(started)
+            return connection
+
+    def release(self, connection, reusable=True):
+        if reusable:
+            try:
+                connection.rollback()
+            except Exception:
+                reusable = False
+
+        with self._condition:
+            if reusable and not self._expired(connection, None, time.monotonic()):
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._discard(connection)
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            return {
+                **self._stats,
+                "size": self._size,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+            }
+
+    def close_all(self):
+        with self._condition:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._discard(connection)
+
+    def _take_idle(self):
+        while self._idle:
+            connection, released_at = self._idle.pop()
+            if self._expired(connection, released_at, time.monotonic()):
+                self._discard(connection)
+                continue
+            return connection, released_at
+        return None
+
+    def _create(self, connect, started):
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._created_at[id(connection)] = time.monotonic()
+            self._stats["created"] += 1
+            self._record_wait(started)
+        return connection
+
+    def _expired(self, connection, released_at, now):
+        created_at = self._created_at.get(id(connection), now)
+        if self.max_lifetime and now - created_at > self.max_lifetime:
+            return True
+        return bool(
+            released_at is not None
+            and self.max_idle
+            and now - released_at > self.max_idle
+        )
+
+    def _discard(self, connection):
+        self._created_at.pop(id(connection), None)
+        self._size -= 1
+        self._stats["discarded"] += 1
+        try:
+            connection.close()
+        except Exception:
+            logger.debug("Ошибка при закрытии соединения пула %s", self.name)
+
+    def _record_wait(self, started):
+        wait = time.monotonic() - started
+        self._stats["acquired"] += 1
+        self._stats["wait_total"] += wait
+        self._stats["wait_max"] = max(self._stats["wait_max"], wait)
+        if wait >= self.slow_wait:
+            self._stats["waited"] += 1
+            logger.warning(
+                "Ожидание соединения из пула %s заняло %.3f с", self.name, wait
+            )
+
+
+def get_pool(key, name, pool_settings):
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                name,
+                max_size=pool_settings.get("MAX_SIZE", 10),
+                timeout=pool_settings.get("TIMEOUT", 5.0),
+                max_idle=pool_settings.get("MAX_IDLE", 300.0),
+                max_lifetime=pool_settings.get("MAX_LIFETIME", 3600.0),
+                check_after=pool_settings.get("CHECK_AFTER", 30.0),
+                slow_wait=pool_settings.get("SLOW_WAIT", 0.1),
+            )
+        return _pools[key]
+
+
+def reset_after_fork():
+    # Соединения родительского процесса принадлежат ему: закрывать их в
+    # дочернем нельзя, достаточно забыть пулы и создать их заново.
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
+
+
+class PooledDatabaseWrapperMixin:
+
+    health_check_done = False
+
+    def get_pool_settings(self):
+        pool_settings = self.settings_dict.get("POOL")
+        if not pool_settings or not pool_settings.get("ENABLED", True):
+            return None
+        return pool_settings
+
+    @property
+    def pool(self):
+        pool_settings = self.get_pool_settings()
+        if pool_settings is None:
+            return None
+        return get_pool(
+            (self.alias, str(self.settings_dict["NAME"])), self.alias, pool_settings
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        return pool.acquire(
+            lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(
+                conn_params
+            ),
+            self._ping,
+        )
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.release(self.connection, reusable=not self.in_atomic_block)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and not self.health_check_done
+            and not self.in_atomic_block
+            and self.settings_dict.get("HEALTH_CHECKS")
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    @staticmethod
+    def _ping(connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            finally:
+                cursor.close()
+        except Exception:
+            return False
+        return True
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .db.routers import use_primary
+
+# Поля, из которых собираются фрагменты; сохранение с update_fields только из
+# других полей (счётчики, last_login) фрагменты не сбрасывает.
+RECIPE_BODY_FIELDS = ("author_id", "name", "image", "text", "cooking_time", "servings")
+PROFILE_FIELDS = ("email", "username", "first_name", "last_name", "avatar")
+# Метка на месте сброшенного фрагмента: пока она жива, фрагмент читается из
+# базы, но не кешируется.
+INVALIDATED = "__invalidated__"
+
+
+def recipe_body_key(recipe_id):
+    return f"recipe:{recipe_id}:body"
+
+
+def recipe_ingredients_key(recipe_id):
+    return f"recipe:{recipe_id}:ingredients"
+
+
+def profile_key(user_id):
+    return f"user:{user_id}:profile"
+
+
+def _touches(update_fields, fields):
+    if update_fields is None:
+        return True
+    names = set(fields) | {field.removesuffix("_id") for field in fields}
+    return bool(names & set(update_fields))
+
+
+def recipe_keys(recipe_id, update_fields=None):
+    keys = []
+    if _touches(update_fields, RECIPE_BODY_FIELDS):
+        keys.append(recipe_body_key(recipe_id))
+    if _touches(update_fields, ("ingredients_snapshot",)):
+        keys.append(recipe_ingredients_key(recipe_id))
+    return keys
+
+
+def profile_keys(user_id, update_fields=None):
+    if _touches(update_fields, PROFILE_FIELDS):
+        return [profile_key(user_id)]
+    return []
+
+
+class FragmentStore:
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_many(self, keys, load):
+        # load получает ключи, которых нет в кеше, и возвращает найденные
+        # фрагменты; отсутствующие в базе объекты не кешируются.
+        found = {
+            key: value
+            for key, value in self.cache.get_many(keys).items()
+            if value != INVALIDATED
+        }
+        missing = [key for key in keys if key not in found]
+        if missing:
+            # Реплика может отставать, а фрагмент живёт в кеше сутки.
+            with use_primary():
+                loaded = load(missing)
+            for key, value in loaded.items():
+                # add не перезапишет метку сброса: значение, прочитанное до
+                # коммита изменения, в кеш не попадёт.
+                self.cache.add(key, value)
+            found.update(loaded)
+        return found
+
+    def invalidate(self, keys, using=None):
+        if not keys:
+            return
+        # Сбрасываем после коммита, иначе параллельный запрос успеет положить
+        # в кеш ещё старые данные.
+        keys = list(keys)
+        transaction.on_commit(
+            lambda: self.cache.set_many(
+                dict.fromkeys(keys, INVALIDATED), settings.FRAGMENT_INVALIDATION_GRACE
+            ),
+            using=using,
+        )
+
+
+fragments = FragmentStore(settings.FRAGMENT_CACHE_ALIAS)
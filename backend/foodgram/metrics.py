@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+
+# Логгер gunicorn настроен и в sync-, и в uvicorn-воркерах, отчёты пишутся
+# туда же, куда остальной лог сервера.
+logger = logging.getLogger("gunicorn.error")
+
+
+class RequestMetrics:
+
+    def __init__(self, window=1000, report_interval=60.0, slow=1.0):
+        self.window = window
+        self.report_interval = report_interval
+        self.slow = slow
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._durations = deque(maxlen=self.window)
+            self._requests = 0
+            self._errors = 0
+            self._slow = 0
+            self._in_flight = 0
+            self._since = time.monotonic()
+
+    def started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def finished(self, duration, status):
+        with self._lock:
+            self._in_flight -= 1
+            self._requests += 1
+            self._durations.append(duration)
+            if status >= 500:
+                self._errors += 1
+            if duration >= self.slow:
+                self._slow += 1
+
+    def due(self):
+        return time.monotonic() - self._since >= self.report_interval
+
+    def collect(self):
+        with self._lock:
+            now = time.monotonic()
+            durations = sorted(self._durations)
+            report = {
+                "requests": self._requests,
+                "rps": round(self._requests / max(now - self._since, 1e-9), 2),
+                "errors": self._errors,
+                "slow": self._slow,
+                "in_flight": self._in_flight,
+                "p50_ms": _percentile(durations, 0.5),
+                "p95_ms": _percentile(durations, 0.95),
+                "p99_ms": _percentile(durations, 0.99),
+                "max_ms": _percentile(durations, 1.0),
+            }
+            self._durations.clear()
+            self._requests = self._errors = self._slow = 0
+            self._since = now
+        return report
+
+
+def _percentile(durations, fraction):
+    if not durations:
+        return 0
+    index = min(len(durations) - 1, int(len(durations) * fraction))
+    return round(durations[index] * 1000, 1)
+
+
+def format_report(report):
+    return " ".join(f"{key}={value}" for key, value in report.items())
+
+
+request_metrics = RequestMetrics()
+
+
+def report():
+    from foodgram.db.pool import pool_stats
+
+    metrics = request_metrics.collect()
+    for name, stats in pool_stats().items():
+        metrics[f"pool_{name}_size"] = stats["size"]
+        metrics[f"pool_{name}_waited"] = stats["waited"]
+    logger.info("worker=%s %s", os.getpid(), format_report(metrics))
+
+
+def _finished(request, response, started):
+    duration = time.monotonic() - started
+    request_metrics.finished(
+        duration, response.status_code if response is not None else 500
+    )
+    if duration >= request_metrics.slow:
+        logger.warning(
+            "Медленный запрос %s %s: %.3f с", request.method, request.path, duration
+        )
+    if request_metrics.due():
+        report()
+
+
+@sync_and_async_middleware
+def request_metrics_middleware(get_response):
+    # Хуки pre_request/post_request gunicorn не вызывает для UvicornWorker,
+    # поэтому запросы считаются здесь — одинаково для WSGI и ASGI.
+    if not settings.REQUEST_METRICS:
+        raise MiddlewareNotUsed
+    request_metrics.report_interval = settings.REQUEST_METRICS_INTERVAL
+    request_metrics.slow = settings.REQUEST_SLOW_SECONDS
+
+    if asyncio.iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            started = time.monotonic()
+            request_metrics.started()
+            response = None
+            try:
+                response = await get_response(request)
+                return response
+            finally:
+                _finished(request, response, started)
+
+    else:
+
+        def middleware(request):
+            started = time.monotonic()
+            request_metrics.started()
+            response = None
+            try:
+                response = get_response(request)
+                return response
+            finally:
+                _finished(request, response, started)
+
+    return middleware
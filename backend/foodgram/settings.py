@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -18,12 +19,31 @@ RECIPES_PER_PAGE = 6
 MAX_PAGE_SIZE = 100
 PAGE_SIZE_QUERY_PARAM = "limit"
 
+FLAT_LIST_READS = os.getenv("FLAT_LIST_READS", "True") == "True"
+VIEWER_CONTEXT_MAX_IDS = int(os.getenv("VIEWER_CONTEXT_MAX_IDS", "1000"))
+ASYNC_READ_VIEWS = os.getenv("SERVER_MODE", "wsgi") == "asgi"
+
+# Метрики запросов каждого процесса пишутся в лог раз в
+# REQUEST_METRICS_INTERVAL секунд и при остановке воркера gunicorn.
+REQUEST_METRICS = os.getenv("REQUEST_METRICS", "True") == "True"
+REQUEST_METRICS_INTERVAL = float(os.getenv("GUNICORN_METRICS_INTERVAL", "60"))
+REQUEST_SLOW_SECONDS = float(os.getenv("GUNICORN_SLOW_REQUEST", "1"))
+
+FRONTEND_RECIPE_URL = "/recipes/{id}/"
+SHORT_LINK_CACHE_TIMEOUT = 24 * 60 * 60
+SHORT_LINK_MISS_TIMEOUT = 60
+SHORT_LINK_VISITS_FLUSH_SIZE = 100
+SHORT_LINK_VISITS_FLUSH_INTERVAL = 30
+
 MAX_EMAIL_LENGTH = 254
 MAX_USERNAME_LENGTH = 150
 MAX_FIRST_NAME_LENGTH = 150
 MAX_LAST_NAME_LENGTH = 150
 MIN_INGREDIENT_AMOUNT = 1
 MIN_COOKING_TIME = 1
+MIN_SERVINGS = 1
+MAX_SERVINGS = 100
+DEFAULT_SERVINGS = 1
 
 MAX_INGREDIENT_NAME_LENGTH = 128
 MAX_INGREDIENT_MEASUREMENT_UNIT_LENGTH = 64
@@ -43,10 +63,15 @@ INSTALLED_APPS = [
     "django_filters",
     "recipes",
     "api",
+    "outbox",
+    "jobs",
 ]
 
 MIDDLEWARE = [
+    "foodgram.metrics.request_metrics_middleware",
     "django.middleware.security.SecurityMiddleware",
+    "foodgram.compression.CompressionMiddleware",
+    "foodgram.db.middleware.PrimaryPinningMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -60,7 +85,7 @@ ROOT_URLCONF = "foodgram.urls"
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [],
+        "DIRS": [BASE_DIR / "foodgram" / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -76,17 +101,108 @@ TEMPLATES = [
 WSGI_APPLICATION = "foodgram.wsgi.application"
 
 
+DB_ENGINES = {
+    "django.db.backends.postgresql": "foodgram.db.postgresql",
+    "django.db.backends.sqlite3": "foodgram.db.sqlite3",
+}
+DB_ENGINE = os.getenv("DB_ENGINE", "django.db.backends.sqlite3")
+
+# off — соединение на запрос, persistent — постоянные соединения с проверкой
+# перед первым запросом, pool — пул соединений внутри процесса (для ASGI).
+DB_POOL_MODE = os.getenv(
+    "DB_POOL_MODE",
+    "pool" if os.getenv("SERVER_MODE", "wsgi") == "asgi" else "persistent",
+)
+
 DATABASES = {
     "default": {
-        "ENGINE": os.getenv("DB_ENGINE", "django.db.backends.sqlite3"),
+        "ENGINE": DB_ENGINES.get(DB_ENGINE, DB_ENGINE),
         "NAME": os.getenv("DB_NAME", BASE_DIR / "db.sqlite3"),
         "USER": os.getenv("POSTGRES_USER", "postgres"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "postgres"),
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        "CONN_MAX_AGE": (
+            int(os.getenv("DB_CONN_MAX_AGE", "600"))
+            if DB_POOL_MODE == "persistent"
+            else 0
+        ),
+        "HEALTH_CHECKS": DB_POOL_MODE == "persistent",
+        "POOL": {
+            "ENABLED": DB_POOL_MODE == "pool",
+            "MAX_SIZE": int(os.getenv("DB_POOL_SIZE", "10")),
+            "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+            "MAX_IDLE": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+            "MAX_LIFETIME": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+            "SLOW_WAIT": float(os.getenv("DB_POOL_SLOW_WAIT", "0.1")),
+        },
     }
 }
 
+# Реплики для чтения: для PostgreSQL — список host[:port], для SQLite — пути
+# к файлам базы.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(
+    filter(None, os.getenv("DB_REPLICAS", "").split(",")), start=1
+):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "POOL": dict(DATABASES["default"]["POOL"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    if DB_ENGINE == "django.db.backends.sqlite3":
+        DATABASES[alias]["NAME"] = replica
+    else:
+        host, _, port = replica.partition(":")
+        DATABASES[alias]["HOST"] = host
+        DATABASES[alias]["PORT"] = port or DATABASES["default"]["PORT"]
+    DATABASE_REPLICAS.append(alias)
+
+if DB_ENGINE == "django.db.backends.postgresql":
+    # Поиск ингредиентов по триграммам (lookup trigram_similar).
+    INSTALLED_APPS.append("django.contrib.postgres")
+
+DATABASE_ROUTERS = ["foodgram.db.routers.ReplicaRouter"]
+
+# После записи клиент читает с основной базы, пока не истечет это окно.
+REPLICA_PIN_COOKIE = "primary_pin"
+REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", "15"))
+
+# Кеш в памяти процесса подходит только для одного процесса: сброс фрагмента
+# в одном воркере не виден остальным. В docker-compose используется memcached
+# (django.core.cache.backends.memcached.PyMemcacheCache).
+CACHE_BACKEND = os.getenv(
+    "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+)
+CACHE_LOCATION = os.getenv("CACHE_LOCATION", "")
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": CACHE_LOCATION,
+    },
+    "fragments": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": CACHE_LOCATION or "fragments",
+        "KEY_PREFIX": "fragments",
+        # Увеличить при изменении формата фрагментов.
+        "VERSION": 1,
+        "TIMEOUT": int(os.getenv("FRAGMENT_CACHE_TIMEOUT", str(24 * 60 * 60))),
+        "OPTIONS": (
+            {"MAX_ENTRIES": 10000} if CACHE_BACKEND.endswith("LocMemCache") else {}
+        ),
+    },
+}
+
+# Детальная страница рецепта собирается из фрагментов recipe:{id}:body,
+# recipe:{id}:ingredients и user:{id}:profile; флаги зрителя считаются на
+# каждый запрос.
+RECIPE_FRAGMENT_CACHE = os.getenv("RECIPE_FRAGMENT_CACHE", "True") == "True"
+FRAGMENT_CACHE_ALIAS = "fragments"
+# Столько секунд после сброса фрагмент читается из основной базы без
+# кеширования: запрос, начатый до коммита, не вернёт в кеш старые данные.
+FRAGMENT_INVALIDATION_GRACE = 10
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -121,9 +237,40 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Файлы называются по sha256 содержимого: одинаковые загрузки хранятся один
+# раз, а URL неизменяемы и кешируются nginx без ограничения срока.
+DEFAULT_FILE_STORAGE = "foodgram.storage.ContentAddressedStorage"
+MEDIA_DELETE_GRACE = int(os.getenv("MEDIA_DELETE_GRACE", "300"))
+
+PROTECTED_MEDIA_ROOT = os.path.join(MEDIA_ROOT, "protected")
+PROTECTED_MEDIA_INTERNAL_URL = "/protected/"
+MEDIA_ACCEL_REDIRECT = os.getenv("MEDIA_ACCEL_REDIRECT", str(not DEBUG)) == "True"
+
+# HTML не сжимаем: страницы админки содержат CSRF-токен (атака BREACH).
+COMPRESSION_CONTENT_TYPES = ("application/json", "text/plain")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+PRECOMPRESS_EXTENSIONS = (
+    ".css",
+    ".html",
+    ".js",
+    ".json",
+    ".map",
+    ".svg",
+    ".txt",
+    ".xml",
+    ".yml",
+)
+
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Списки в админке считаются точно не дальше этого предела; для больших
+# нефильтрованных таблиц PostgreSQL берётся оценка из pg_class.reltuples,
+# для фильтров сверх предела — оценка планировщика из EXPLAIN.
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv("ADMIN_EXACT_COUNT_LIMIT", "100000"))
+
 AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
@@ -131,12 +278,76 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ],
     "DEFAULT_PAGINATION_CLASS": "api.pagination.RecipePagination",
     "PAGE_SIZE": RECIPES_PER_PAGE,
+    "DEFAULT_THROTTLE_CLASSES": [
+        "api.throttling.ActionTokenBucketThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        "writes": os.getenv("THROTTLE_RATE_WRITES", "120/min"),
+        "uploads": os.getenv("THROTTLE_RATE_UPLOADS", "20/min"),
+        "downloads": os.getenv("THROTTLE_RATE_DOWNLOADS", "10/min"),
+        "search": os.getenv("THROTTLE_RATE_SEARCH", "300/min"),
+        "signup": os.getenv("THROTTLE_RATE_SIGNUP", "10/hour"),
+    },
 }
 
+# Состояние ограничений запросов общее для всех воркеров gunicorn на хосте.
+THROTTLE_STORE_PATH = os.getenv(
+    "THROTTLE_STORE_PATH", os.path.join(tempfile.gettempdir(), "foodgram_throttle.db")
+)
+
+# Токены кешируются в общем кеше, сброс при выходе, смене пароля и изменении
+# пользователя виден всем воркерам. TTL ограничивает время жизни записи, если
+# пользователя изменили в обход сигналов (queryset.update()).
+TOKEN_CACHE_ALIAS = "default"
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "60"))
+
+# auto — триграммы pg_trgm в PostgreSQL и индекс в памяти процесса в остальных
+# базах; memory или trigram — принудительно.
+INGREDIENT_SEARCH_BACKEND = os.getenv("INGREDIENT_SEARCH_BACKEND", "auto")
+INGREDIENT_SEARCH_LIMIT = 50
+INGREDIENT_SEARCH_THRESHOLD = 0.3
+INGREDIENT_SEARCH_MAX_DISTANCE = 2
+INGREDIENT_SEARCH_INDEX_TTL = int(os.getenv("INGREDIENT_SEARCH_INDEX_TTL", "300"))
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_RETRY_BASE = 5
+OUTBOX_RETRY_MAX = 60 * 60
+OUTBOX_RETENTION = 7 * 24 * 60 * 60
+OUTBOX_PURGE_INTERVAL = 60 * 60
+
+# Очередь фоновых задач в базе: run_workers запускает JOBS_PROCESSES
+# процессов. Задача, воркер которой не отчитался за JOBS_LEASE секунд,
+# возвращается в очередь. JOBS_EAGER выполняет задачи сразу после коммита в
+# том же процессе — для тестов и разработки без воркеров.
+JOBS_PROCESSES = int(os.getenv("JOBS_PROCESSES", "2"))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "1"))
+JOBS_EAGER = os.getenv("JOBS_EAGER", "False") == "True"
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "5"))
+JOBS_RETRY_BASE = 10
+JOBS_RETRY_MAX = 60 * 60
+JOBS_LEASE = int(os.getenv("JOBS_LEASE", str(15 * 60)))
+JOBS_SHUTDOWN_TIMEOUT = 30
+JOBS_RETENTION = 24 * 60 * 60
+JOBS_PURGE_INTERVAL = 60 * 60
+JOBS_POLL_HINT = 2
+
+# Удалённые пользователи и рецепты сразу скрываются, а зависимые строки
+# удаляются задачами очереди пачками по DELETION_BATCH_SIZE, каждая в своей
+# транзакции. purge_deleted повторно ставит очистку для строк, удалённых
+# раньше чем DELETION_STALE_AFTER секунд назад.
+DELETION_BATCH_SIZE = int(os.getenv("DELETION_BATCH_SIZE", "500"))
+DELETION_STALE_AFTER = 24 * 60 * 60
+
 DJOSER = {
     "LOGIN_FIELD": "email",
     "HIDE_USERS": False,
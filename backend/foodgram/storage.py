@@ -0,0 +1,192 @@
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import time
+from urllib.parse import quote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+from django.http import FileResponse, HttpResponse
+from django.utils.functional import LazyObject
+
+from .compression import PRECOMPRESSED_SUFFIXES
+
+HASHED_NAME_RE = re.compile(
+    r"(?:^|/)[0-9a-f]{2}/[0-9a-f]{64}(?:\.[A-Za-z0-9]+)?(?:\.gz|\.br)?$"
+)
+
+
+def original_name(name):
+    # Имя исходного файла для сжатой копии name.gz / name.br.
+    for suffix in PRECOMPRESSED_SUFFIXES.values():
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    chunk_size = 64 * 1024
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.get_hashed_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def delete(self, name):
+        super().delete(name)
+        for suffix in PRECOMPRESSED_SUFFIXES.values():
+            super().delete(name + suffix)
+
+    def get_hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, "seek"):
+            content.seek(0)
+        for chunk in content.chunks(self.chunk_size):
+            digest.update(chunk)
+        if hasattr(content, "seek"):
+            content.seek(0)
+        digest = digest.hexdigest()
+        directory, filename = posixpath.split(name.replace("\\", "/"))
+        extension = os.path.splitext(filename)[1].lower()
+        return posixpath.join(directory, digest[:2], digest + extension)
+
+    @staticmethod
+    def is_hashed_name(name):
+        return bool(name and HASHED_NAME_RE.search(name))
+
+
+class ProtectedStorage(LazyObject):
+
+    def _setup(self):
+        self._wrapped = FileSystemStorage(
+            location=settings.PROTECTED_MEDIA_ROOT, base_url=None
+        )
+
+
+protected_storage = ProtectedStorage()
+
+
+def content_addressed_fields():
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField) and isinstance(
+                field.storage, ContentAddressedStorage
+            ):
+                yield model, field
+
+
+def referenced_names():
+    names = set()
+    for model, field in content_addressed_fields():
+        names.update(
+            model._base_manager.exclude(**{field.attname: ""})
+            .exclude(**{f"{field.attname}__isnull": True})
+            .values_list(field.attname, flat=True)
+            .distinct()
+            .iterator()
+        )
+    return names
+
+
+def is_referenced(name):
+    return any(
+        model._base_manager.filter(**{field.attname: name}).exists()
+        for model, field in content_addressed_fields()
+    )
+
+
+def is_recently_saved(storage, name, grace):
+    return time.time() - os.path.getmtime(storage.path(name)) < grace
+
+
+def delete_unreferenced(storage, names, grace=None):
+    if grace is None:
+        grace = settings.MEDIA_DELETE_GRACE
+    deleted = []
+    for name in names:
+        if (
+            ContentAddressedStorage.is_hashed_name(name)
+            and storage.exists(name)
+            and not is_recently_saved(storage, name, grace)
+            and not is_referenced(name)
+        ):
+            storage.delete(name)
+            deleted.append(name)
+    return deleted
+
+
+def _stored_files(instance):
+    return {
+        field.attname: (field.storage, instance.__dict__[field.attname])
+        for field in instance._meta.concrete_fields
+        if isinstance(field, models.FileField)
+        and isinstance(field.storage, ContentAddressedStorage)
+        and field.attname in instance.__dict__
+    }
+
+
+def _release(files, using):
+    for storage, name in files:
+        name = getattr(name, "name", name)
+        if name:
+            transaction.on_commit(
+                lambda storage=storage, name=name: delete_unreferenced(storage, [name]),
+                using=using,
+            )
+
+
+def remember_stored_files(sender, instance, **kwargs):
+    instance._stored_files = {
+        attname: (storage, getattr(value, "name", value))
+        for attname, (storage, value) in _stored_files(instance).items()
+    }
+
+
+def release_replaced_files(sender, instance, using, **kwargs):
+    previous = getattr(instance, "_stored_files", {})
+    current = _stored_files(instance)
+    _release(
+        [
+            (storage, name)
+            for attname, (storage, name) in previous.items()
+            if attname in current
+            and getattr(current[attname][1], "name", current[attname][1]) != name
+        ],
+        using,
+    )
+    remember_stored_files(sender, instance)
+
+
+def release_deleted_files(sender, instance, using, **kwargs):
+    _release(_stored_files(instance).values(), using)
+
+
+def protected_media_response(name, filename=None):
+    if not protected_storage.exists(name):
+        return None
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(
+            content_type=mimetypes.guess_type(name)[0] or "application/octet-stream"
+        )
+        response["X-Accel-Redirect"] = settings.PROTECTED_MEDIA_INTERNAL_URL + quote(
+            name
+        )
+    else:
+        response = FileResponse(protected_storage.open(name, "rb"))
+    if filename:
+        response["Content-Disposition"] = (
+            f"attachment; filename*=UTF-8''{quote(filename)}"
+        )
+    return response
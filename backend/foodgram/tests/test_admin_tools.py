@@ -0,0 +1,33 @@
+import pytest
+
+from foodgram import admin_tools
+from foodgram.admin_tools import EstimatedCountPaginator
+from recipes.models import Ingredient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def ingredients(settings):
+    settings.ADMIN_EXACT_COUNT_LIMIT = 5
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f"соль {number}", measurement_unit="г") for number in range(12)
+    )
+    Ingredient.objects.create(name="перец", measurement_unit="г")
+    return Ingredient.objects.filter(name__startswith="соль").order_by("pk")
+
+
+def test_filtered_count_under_limit_is_exact(settings, ingredients):
+    settings.ADMIN_EXACT_COUNT_LIMIT = 100
+    assert EstimatedCountPaginator(ingredients, 5).count == 12
+
+
+def test_filtered_count_over_limit_is_not_truncated(ingredients):
+    paginator = EstimatedCountPaginator(ingredients, 5)
+    assert paginator.count == 12
+    assert len(paginator.page(3).object_list) == 2
+
+
+def test_filtered_count_over_limit_uses_estimate(ingredients, monkeypatch):
+    monkeypatch.setattr(admin_tools, "estimated_query_count", lambda queryset: 40)
+    assert EstimatedCountPaginator(ingredients, 5).count == 40
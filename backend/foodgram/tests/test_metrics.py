@@ -0,0 +1,33 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+
+from foodgram.metrics import request_metrics
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    request_metrics.reset()
+
+
+def test_sync_requests_are_counted():
+    Client().get("/api/ingredients/")
+    Client().get("/api/missing/")
+    report = request_metrics.collect()
+    assert report["requests"] == 2
+    assert report["in_flight"] == 0
+
+
+def test_async_requests_are_counted():
+    # Под UvicornWorker хуки запросов gunicorn не вызываются, считать должен
+    # сам Django в асинхронной цепочке middleware.
+    async def fetch():
+        return await AsyncClient().get("/api/ingredients/")
+
+    response = async_to_sync(fetch)()
+    assert response.status_code == 200
+    report = request_metrics.collect()
+    assert report["requests"] == 1
+    assert report["in_flight"] == 0
@@ -1,15 +1,16 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.generic import RedirectView
+
+from recipes.views import short_link_redirect
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
-    path(
-        "s/<int:pk>/",
-        RedirectView.as_view(pattern_name="api:recipes-detail"),
+    re_path(
+        r"^s/(?P<code>[0-9A-Za-z]+)/?$",
+        short_link_redirect,
         name="short-link",
     ),
 ]
@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+ASYNC_WORKERS = ("uvicorn.workers.UvicornWorker", "gevent", "eventlet")
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+cpu_count = _cpu_count()
+
+if SERVER_MODE == "asgi":
+    wsgi_app = "foodgram.asgi:application"
+else:
+    wsgi_app = "foodgram.wsgi:application"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+forwarded_allow_ips = "*"
+
+# gthread: несколько потоков на процесс, пока другие ждут базу; для ASGI —
+# событийный цикл uvicorn в каждом процессе.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS") or (
+    "uvicorn.workers.UvicornWorker" if SERVER_MODE == "asgi" else "gthread"
+)
+if worker_class in ASYNC_WORKERS:
+    workers = _env_int("GUNICORN_WORKERS", cpu_count)
+    threads = 1
+    worker_connections = _env_int("GUNICORN_WORKER_CONNECTIONS", 1000)
+elif worker_class == "gthread":
+    workers = _env_int("GUNICORN_WORKERS", cpu_count * 2 + 1)
+    threads = _env_int("GUNICORN_THREADS", 4)
+else:
+    workers = _env_int("GUNICORN_WORKERS", cpu_count * 2 + 1)
+    threads = 1
+
+timeout = _env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _env_int("GUNICORN_KEEPALIVE", 5)
+
+# Перезапуск воркеров ограничивает рост памяти; разброс не даёт им
+# перезапускаться одновременно.
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10)
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "True") == "True"
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def pre_fork(server, worker):
+    from django.conf import settings
+
+    if settings.configured:
+        from django.db import connections
+
+        connections.close_all()
+
+
+def post_fork(server, worker):
+    from foodgram.db.pool import reset_after_fork
+    from foodgram.metrics import request_metrics
+
+    reset_after_fork()
+    # Запросы считает foodgram.metrics.request_metrics_middleware; счётчики,
+    # унаследованные от мастера, в отчёт воркера не попадают.
+    request_metrics.reset()
+
+
+def worker_exit(server, worker):
+    from foodgram.metrics import report
+
+    report()
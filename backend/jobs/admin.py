@@ -0,0 +1,44 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from foodgram.admin_tools import LargeTableAdminMixin
+from .models import FAILED, QUEUED, Job
+
+
+@admin.register(Job)
+class JobAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = (
+        "id",
+        "kind",
+        "status",
+        "priority",
+        "user",
+        "created_at",
+        "attempts",
+        "finished_at",
+    )
+    list_filter = ("status", "kind")
+    list_select_related = ("user",)
+    search_fields = ("=kind",)
+    readonly_fields = (
+        "kind",
+        "payload",
+        "user",
+        "status",
+        "attempts",
+        "created_at",
+        "started_at",
+        "finished_at",
+        "locked_by",
+        "locked_until",
+        "result",
+        "last_error",
+    )
+    actions = ("retry",)
+
+    def retry(self, request, queryset):
+        queryset.filter(status=FAILED).update(
+            status=QUEUED, attempts=0, available_at=timezone.now(), finished_at=None
+        )
+
+    retry.short_description = "Повторить задачу"
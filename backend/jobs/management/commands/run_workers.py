@@ -0,0 +1,137 @@
+import logging
+import multiprocessing
+import signal
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connections
+
+from foodgram.db.pool import reset_after_fork
+from jobs.worker import (
+    claim,
+    execute,
+    purge_finished,
+    requeue_expired,
+    run_pending,
+    worker_name,
+)
+
+logger = logging.getLogger("foodgram.jobs")
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает пул процессов, выполняющих фоновые задачи из очереди "
+        "в базе данных"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=settings.JOBS_PROCESSES,
+            help="Число процессов-воркеров",
+        )
+        parser.add_argument(
+            "--kind",
+            action="append",
+            help="Выполнять только задачи этого типа, можно повторять",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить накопившиеся задачи в текущем процессе и завершиться",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help="Пауза в секундах, когда очередь пуста",
+        )
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        if options["once"]:
+            requeue_expired()
+            processed = run_pending(kinds=options["kind"])
+            self.stdout.write(self.style.SUCCESS(f"Выполнено задач: {processed}"))
+            return
+
+        context = multiprocessing.get_context("fork")
+        workers = {}
+        maintained_at = purged_at = 0
+        while self.running:
+            for index in range(options["processes"]):
+                process = workers.get(index)
+                if process is None or not process.is_alive():
+                    if process is not None:
+                        self.stdout.write(
+                            self.style.WARNING(
+                                f"Воркер {index} завершился с кодом "
+                                f"{process.exitcode}, перезапуск"
+                            )
+                        )
+                    # Соединения родителя не должны достаться дочерним
+                    # процессам.
+                    connections.close_all()
+                    workers[index] = context.Process(
+                        target=self.work,
+                        args=(index, options["kind"], options["sleep"]),
+                        daemon=True,
+                    )
+                    workers[index].start()
+
+            if time.monotonic() - maintained_at > settings.JOBS_LEASE / 2:
+                close_old_connections()
+                requeued = requeue_expired()
+                if requeued:
+                    self.stdout.write(
+                        self.style.WARNING(f"Возвращено в очередь задач: {requeued}")
+                    )
+                maintained_at = time.monotonic()
+            if time.monotonic() - purged_at > settings.JOBS_PURGE_INTERVAL:
+                purge_finished(timedelta(seconds=settings.JOBS_RETENTION))
+                purged_at = time.monotonic()
+            time.sleep(1)
+
+        # SIGTERM: воркер доделывает текущую задачу и выходит.
+        for process in workers.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + settings.JOBS_SHUTDOWN_TIMEOUT
+        for process in workers.values():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.kill()
+        self.stdout.write(self.style.SUCCESS("Воркеры остановлены"))
+
+    def work(self, index, kinds, sleep):
+        reset_after_fork()
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        # Ctrl+C получает вся группа процессов, а останавливает их родитель.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        worker = worker_name(index)
+        while self.running:
+            close_old_connections()
+            try:
+                job = claim(worker, kinds)
+                if job is not None:
+                    execute(job)
+            except DatabaseError:
+                # Задача, которую не удалось отметить, вернётся в очередь по
+                # истечении аренды.
+                logger.exception("Ошибка базы данных в воркере %s", worker)
+                connections.close_all()
+                job = None
+            if job is None:
+                time.sleep(sleep)
+        connections.close_all()
+
+    def stop(self, signum, frame):
+        self.running = False
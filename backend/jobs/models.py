@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+STATUSES = (
+    (QUEUED, "В очереди"),
+    (RUNNING, "Выполняется"),
+    (SUCCEEDED, "Выполнена"),
+    (FAILED, "Ошибка"),
+)
+FINISHED = (SUCCEEDED, FAILED)
+
+# Задачи, которых ждёт пользователь, идут раньше служебных.
+HIGH_PRIORITY = 10
+LOW_PRIORITY = -10
+
+
+def default_max_attempts():
+    return settings.JOBS_MAX_ATTEMPTS
+
+
+class Job(models.Model):
+    kind = models.CharField(max_length=64, verbose_name="Тип")
+    payload = models.JSONField(default=dict, verbose_name="Данные")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="jobs",
+        verbose_name="Пользователь",
+    )
+    status = models.CharField(
+        max_length=16, choices=STATUSES, default=QUEUED, verbose_name="Статус"
+    )
+    priority = models.SmallIntegerField(
+        default=0, verbose_name="Приоритет", help_text="Чем больше, тем раньше"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Попытки")
+    max_attempts = models.PositiveSmallIntegerField(
+        default=default_max_attempts, verbose_name="Максимум попыток"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создана")
+    available_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Доступна для запуска с"
+    )
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Начата")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Завершена")
+    locked_by = models.CharField(max_length=64, blank=True, verbose_name="Воркер")
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name="Занята до")
+    result = models.JSONField(null=True, blank=True, verbose_name="Результат")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+
+    class Meta:
+        verbose_name = "Задача"
+        verbose_name_plural = "Задачи"
+        ordering = ["-id"]
+        indexes = [
+            models.Index(
+                fields=["-priority", "available_at", "id"],
+                condition=models.Q(status=QUEUED),
+                name="jobs_queued_idx",
+            ),
+            models.Index(
+                fields=["locked_until"],
+                condition=models.Q(status=RUNNING),
+                name="jobs_running_idx",
+            ),
+            models.Index(fields=["finished_at"], name="jobs_finished_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk}"
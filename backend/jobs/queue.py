@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+
+def enqueue(
+    kind, user=None, priority=0, delay=None, max_attempts=None, using=None, **payload
+):
+    job = Job.objects.using(using).create(
+        kind=kind,
+        user=user,
+        priority=priority,
+        available_at=timezone.now() + delay if delay else timezone.now(),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        payload=payload,
+    )
+    if settings.JOBS_EAGER:
+        from .worker import run_job
+
+        transaction.on_commit(lambda: run_job(job.pk, using=job._state.db), using=using)
+    return job
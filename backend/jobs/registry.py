@@ -0,0 +1,15 @@
+_tasks = {}
+
+
+def task(kind):
+    def register(func):
+        if kind in _tasks:
+            raise ValueError(f"Задача {kind} уже зарегистрирована")
+        _tasks[kind] = func
+        return func
+
+    return register
+
+
+def get_task(kind):
+    return _tasks.get(kind)
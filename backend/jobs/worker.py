@@ -0,0 +1,162 @@
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from foodgram.storage import protected_storage
+from .models import FAILED, FINISHED, QUEUED, RUNNING, SUCCEEDED, Job
+from .registry import get_task
+
+logger = logging.getLogger("foodgram.jobs")
+
+
+def worker_name(index=0):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def retry_delay(attempts):
+    delay = min(settings.JOBS_RETRY_BASE * 2 ** (attempts - 1), settings.JOBS_RETRY_MAX)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _take(pk, worker, using):
+    # На базах без SELECT ... FOR UPDATE (SQLite) задачу может выбрать
+    # несколько воркеров сразу, поэтому забираем её условным UPDATE.
+    now = timezone.now()
+    return (
+        Job.objects.using(using)
+        .filter(pk=pk, status=QUEUED)
+        .update(
+            status=RUNNING,
+            attempts=F("attempts") + 1,
+            started_at=now,
+            locked_by=worker,
+            locked_until=now + timedelta(seconds=settings.JOBS_LEASE),
+        )
+    )
+
+
+def claim(worker, kinds=None, using="default"):
+    while True:
+        queued = Job.objects.using(using).filter(
+            status=QUEUED, available_at__lte=timezone.now()
+        )
+        if kinds:
+            queued = queued.filter(kind__in=kinds)
+        with transaction.atomic(using=using):
+            pk = (
+                queued.select_for_update(skip_locked=True)
+                .order_by("-priority", "available_at", "id")
+                .values_list("pk", flat=True)
+                .first()
+            )
+            if pk is None:
+                return None
+            if _take(pk, worker, using):
+                return Job.objects.using(using).get(pk=pk)
+
+
+def execute(job, using="default"):
+    clear_lock = {"locked_by": "", "locked_until": None}
+    task = get_task(job.kind)
+    try:
+        if task is None:
+            raise LookupError(f"Неизвестный тип задачи: {job.kind}")
+        result = task(job)
+    except Exception:
+        now = timezone.now()
+        changes = {"last_error": traceback.format_exc(limit=5), **clear_lock}
+        if job.attempts >= job.max_attempts:
+            changes.update(status=FAILED, finished_at=now)
+            logger.error(
+                "Задача %s #%s не выполнена после %s попыток",
+                job.kind,
+                job.pk,
+                job.attempts,
+            )
+        else:
+            changes.update(status=QUEUED, available_at=now + retry_delay(job.attempts))
+            logger.warning(
+                "Ошибка задачи %s #%s, попытка %s",
+                job.kind,
+                job.pk,
+                job.attempts,
+                exc_info=True,
+            )
+    else:
+        changes = {
+            "status": SUCCEEDED,
+            "result": result,
+            "finished_at": timezone.now(),
+            **clear_lock,
+        }
+    # Если аренда истекла и задачу уже забрал другой воркер, итог этого
+    # запуска не записываем.
+    updated = (
+        Job.objects.using(using)
+        .filter(pk=job.pk, status=RUNNING, locked_by=job.locked_by)
+        .update(**changes)
+    )
+    for name, value in changes.items():
+        setattr(job, name, value)
+    return bool(updated)
+
+
+def run_job(pk, worker=None, using="default"):
+    worker = worker or worker_name()
+    if not _take(pk, worker, using):
+        return False
+    return execute(Job.objects.using(using).get(pk=pk), using=using)
+
+
+def run_pending(worker=None, kinds=None, using="default"):
+    worker = worker or worker_name()
+    processed = 0
+    while True:
+        job = claim(worker, kinds, using=using)
+        if job is None:
+            return processed
+        execute(job, using=using)
+        processed += 1
+
+
+def requeue_expired(using="default"):
+    now = timezone.now()
+    expired = Job.objects.using(using).filter(status=RUNNING, locked_until__lt=now)
+    failed = expired.filter(attempts__gte=F("max_attempts")).update(
+        status=FAILED,
+        finished_at=now,
+        locked_by="",
+        locked_until=None,
+        last_error="Воркер не завершил задачу до истечения аренды",
+    )
+    requeued = expired.update(
+        status=QUEUED, available_at=now, locked_by="", locked_until=None
+    )
+    return requeued + failed
+
+
+def purge_finished(older_than, batch_size=1000, using="default"):
+    deleted = 0
+    threshold = timezone.now() - older_than
+    while True:
+        jobs = list(
+            Job.objects.using(using)
+            .filter(status__in=FINISHED, finished_at__lt=threshold)
+            .values_list("pk", "result")[:batch_size]
+        )
+        if not jobs:
+            return deleted
+        for _, result in jobs:
+            if isinstance(result, dict) and result.get("file"):
+                protected_storage.delete(result["file"])
+        deleted += (
+            Job.objects.using(using).filter(pk__in=[pk for pk, _ in jobs]).delete()[0]
+        )
@@ -0,0 +1,28 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from foodgram.admin_tools import LargeTableAdminMixin
+from .models import OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("id", "topic", "created_at", "attempts", "processed_at")
+    search_fields = ("=topic",)
+    readonly_fields = (
+        "topic",
+        "payload",
+        "created_at",
+        "attempts",
+        "last_error",
+        "processed_at",
+        "failed_at",
+    )
+    actions = ("retry",)
+
+    def retry(self, request, queryset):
+        queryset.filter(processed_at__isnull=True).update(
+            failed_at=None, attempts=0, available_at=timezone.now()
+        )
+
+    retry.short_description = "Повторить обработку"
@@ -0,0 +1,16 @@
+from collections import defaultdict
+
+_handlers = defaultdict(list)
+
+
+def handler(*topics):
+    def register(func):
+        for topic in topics:
+            _handlers[topic].append(func)
+        return func
+
+    return register
+
+
+def get_handlers(topic):
+    return _handlers.get(topic, ())
@@ -0,0 +1,55 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from outbox.processor import process_batch, purge_processed
+
+
+class Command(BaseCommand):
+    help = "Обрабатывает события из очереди outbox пакетами"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Обработать накопившиеся события и завершиться",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=settings.OUTBOX_POLL_INTERVAL,
+            help="Пауза в секундах, когда очередь пуста",
+        )
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        processed = 0
+        purged_at = 0
+        while self.running:
+            close_old_connections()
+            count = process_batch(options["batch_size"])
+            processed += count
+
+            if time.monotonic() - purged_at > settings.OUTBOX_PURGE_INTERVAL:
+                purge_processed(timedelta(seconds=settings.OUTBOX_RETENTION))
+                purged_at = time.monotonic()
+
+            if count < options["batch_size"]:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Обработано событий: {processed}"))
+
+    def stop(self, signum, frame):
+        self.running = False
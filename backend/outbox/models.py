@@ -0,0 +1,33 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    topic = models.CharField(max_length=64, verbose_name="Тема")
+    payload = models.JSONField(default=dict, verbose_name="Данные")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    available_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Доступно для обработки с"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Попытки")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+    processed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Обработано"
+    )
+    failed_at = models.DateTimeField(null=True, blank=True, verbose_name="Отклонено")
+
+    class Meta:
+        verbose_name = "Событие"
+        verbose_name_plural = "События"
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["available_at", "id"],
+                condition=models.Q(processed_at__isnull=True, failed_at__isnull=True),
+                name="outbox_pending_idx",
+            ),
+            models.Index(fields=["processed_at"], name="outbox_processed_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk}"
@@ -0,0 +1,81 @@
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .handlers import get_handlers
+from .models import OutboxEvent
+
+logger = logging.getLogger("foodgram.outbox")
+
+
+def retry_delay(attempts):
+    delay = min(
+        settings.OUTBOX_RETRY_BASE * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX
+    )
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def process_batch(batch_size, using="default"):
+    with transaction.atomic(using=using):
+        now = timezone.now()
+        events = list(
+            OutboxEvent.objects.using(using)
+            .select_for_update(skip_locked=True)
+            .filter(
+                processed_at__isnull=True,
+                failed_at__isnull=True,
+                available_at__lte=now,
+            )
+            .order_by("available_at", "id")[:batch_size]
+        )
+        for event in events:
+            event.attempts += 1
+            try:
+                with transaction.atomic(using=using):
+                    for handle in get_handlers(event.topic):
+                        handle(event)
+            except Exception:
+                event.last_error = traceback.format_exc(limit=5)
+                if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    event.failed_at = now
+                    logger.error(
+                        "Событие %s #%s отклонено после %s попыток",
+                        event.topic,
+                        event.pk,
+                        event.attempts,
+                    )
+                else:
+                    event.available_at = now + retry_delay(event.attempts)
+                    logger.warning(
+                        "Ошибка обработки события %s #%s, попытка %s",
+                        event.topic,
+                        event.pk,
+                        event.attempts,
+                        exc_info=True,
+                    )
+            else:
+                event.processed_at = timezone.now()
+        OutboxEvent.objects.using(using).bulk_update(
+            events,
+            ["attempts", "last_error", "available_at", "processed_at", "failed_at"],
+        )
+    return len(events)
+
+
+def purge_processed(older_than, batch_size=1000, using="default"):
+    deleted = 0
+    threshold = timezone.now() - older_than
+    while True:
+        ids = list(
+            OutboxEvent.objects.using(using)
+            .filter(processed_at__lt=threshold)
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += OutboxEvent.objects.using(using).filter(pk__in=ids).delete()[0]
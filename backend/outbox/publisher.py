@@ -0,0 +1,12 @@
+from .models import OutboxEvent
+
+
+def publish(topic, using=None, **payload):
+    return OutboxEvent.objects.using(using).create(topic=topic, payload=payload)
+
+
+def publish_many(topic, payloads, using=None):
+    return OutboxEvent.objects.using(using).bulk_create(
+        [OutboxEvent(topic=topic, payload=payload) for payload in payloads],
+        batch_size=500,
+    )
@@ -1,25 +1,52 @@
 from django.contrib import admin
 
-from .models import Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingCart
+from foodgram.admin_tools import (
+    LargeTableAdminMixin,
+    SoftDeleteAdminMixin,
+    id_range_filter,
+)
+from jobs.models import LOW_PRIORITY
+from jobs.queue import enqueue
+from .deletion import delete_recipe
+from .models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    UnitConversion,
+)
 
 
 class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredient
     min_num = 1
     extra = 1
+    autocomplete_fields = ("ingredient",)
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(SoftDeleteAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "name", "author", "favorites_count")
-    list_filter = ("author", "name")
+    list_filter = (id_range_filter("author", "ID автора"),)
+    list_select_related = ("author",)
+    autocomplete_fields = ("author",)
     search_fields = ("name", "author__username")
+    readonly_fields = ("favorites_count",)
     inlines = (RecipeIngredientInline,)
+    actions = ("recount_favorites",)
+    soft_delete_function = staticmethod(delete_recipe)
 
-    def favorites_count(self, obj):
-        return obj.favorites.count()
+    def recount_favorites(self, request, queryset):
+        job = enqueue(
+            "recipes.recount_favorites",
+            user=request.user,
+            priority=LOW_PRIORITY,
+            recipe_ids=list(queryset.values_list("pk", flat=True)),
+        )
+        self.message_user(request, f"Пересчёт поставлен в очередь: задача #{job.pk}")
 
-    favorites_count.short_description = "В избранном"
+    recount_favorites.short_description = "Пересчитать число добавлений в избранное"
 
 
 @admin.register(Ingredient)
@@ -30,14 +57,30 @@ class IngredientAdmin(admin.ModelAdmin):
 
 
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "user", "recipe")
-    list_filter = ("user",)
+    list_filter = (
+        id_range_filter("user", "ID пользователя"),
+        id_range_filter("recipe", "ID рецепта"),
+    )
+    list_select_related = ("user", "recipe")
+    autocomplete_fields = ("user", "recipe")
     search_fields = ("user__username", "recipe__name")
 
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "user", "recipe")
-    list_filter = ("user",)
+    list_filter = (
+        id_range_filter("user", "ID пользователя"),
+        id_range_filter("recipe", "ID рецепта"),
+    )
+    list_select_related = ("user", "recipe")
+    autocomplete_fields = ("user", "recipe")
     search_fields = ("user__username", "recipe__name")
+
+
+@admin.register(UnitConversion)
+class UnitConversionAdmin(admin.ModelAdmin):
+    list_display = ("id", "unit", "canonical_unit", "factor")
+    search_fields = ("unit", "canonical_unit")
@@ -0,0 +1,242 @@
+from collections import defaultdict
+from decimal import Decimal
+from fractions import Fraction
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from users.models import User
+from .models import (
+    CartIngredientTotal,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    UnitConversion,
+)
+from .scaling import round_amount
+
+BATCH_SIZE = 500
+
+
+def unit_factors(units):
+    factors = {unit: (unit, Decimal(1)) for unit in units}
+    factors.update(
+        (unit, (canonical_unit, factor))
+        for unit, canonical_unit, factor in UnitConversion.objects.filter(
+            unit__in=units
+        ).values_list("unit", "canonical_unit", "factor")
+    )
+    return factors
+
+
+def snapshot_units(*snapshots):
+    return {item["measurement_unit"] for snapshot in snapshots for item in snapshot}
+
+
+def snapshot_totals(snapshot, factors, sign=1):
+    totals = defaultdict(Decimal)
+    for item in snapshot:
+        unit, factor = factors[item["measurement_unit"]]
+        totals[(item["name"], unit)] += sign * Decimal(item["amount"]) * factor
+    return totals
+
+
+def _lock_users(user_ids):
+    list(
+        User.all_objects.select_for_update()
+        .filter(pk__in=user_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def apply_deltas(user_ids, deltas):
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    user_ids = sorted(set(user_ids))
+    if not deltas or not user_ids:
+        return
+    names = {name for name, _ in deltas}
+    # Сигналы post_save приходят уже вне транзакции save(), а блокировка
+    # пользователей без транзакции на PostgreSQL невозможна.
+    with transaction.atomic():
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            batch = user_ids[start : start + BATCH_SIZE]
+            _lock_users(batch)
+            existing = {
+                (row.user_id, row.name, row.measurement_unit): row
+                for row in CartIngredientTotal.objects.filter(
+                    user_id__in=batch, name__in=names
+                )
+            }
+            created, changed, emptied = [], [], []
+            for user_id in batch:
+                for (name, unit), delta in deltas.items():
+                    row = existing.get((user_id, name, unit))
+                    if row is None:
+                        if delta > 0:
+                            created.append(
+                                CartIngredientTotal(
+                                    user_id=user_id,
+                                    name=name,
+                                    measurement_unit=unit,
+                                    amount=delta,
+                                )
+                            )
+                        continue
+                    row.amount += delta
+                    if row.amount > 0:
+                        changed.append(row)
+                    else:
+                        emptied.append(row.pk)
+            CartIngredientTotal.objects.bulk_create(created)
+            CartIngredientTotal.objects.bulk_update(changed, ["amount"])
+            CartIngredientTotal.objects.filter(pk__in=emptied).delete()
+
+
+def _recipe_snapshot(recipe_id):
+    # Удалённый рецепт уже вычтен из корзин в remove_recipes, поэтому
+    # фоновое удаление его строк ShoppingCart итоги не меняет.
+    return (
+        Recipe.objects.filter(pk=recipe_id)
+        .values_list("ingredients_snapshot", flat=True)
+        .first()
+        or []
+    )
+
+
+def _apply_recipe(user_id, recipe_id, sign):
+    snapshot = _recipe_snapshot(recipe_id)
+    apply_deltas(
+        [user_id],
+        snapshot_totals(snapshot, unit_factors(snapshot_units(snapshot)), sign),
+    )
+
+
+def add_recipe(user_id, recipe_id):
+    _apply_recipe(user_id, recipe_id, 1)
+
+
+def remove_recipe(user_id, recipe_id):
+    _apply_recipe(user_id, recipe_id, -1)
+
+
+def sync_recipe_snapshots(changes, queryset=None):
+    changes = {
+        recipe_id: (old, new) for recipe_id, (old, new) in changes.items() if old != new
+    }
+    if not changes:
+        return
+    if queryset is None:
+        queryset = ShoppingCart.objects.all()
+    carts = defaultdict(list)
+    for recipe_id, user_id in queryset.filter(recipe_id__in=changes).values_list(
+        "recipe_id", "user_id"
+    ):
+        carts[recipe_id].append(user_id)
+    if not carts:
+        return
+    factors = unit_factors(
+        snapshot_units(
+            *(snapshot for recipe_id in carts for snapshot in changes[recipe_id])
+        )
+    )
+    for recipe_id, user_ids in carts.items():
+        old, new = changes[recipe_id]
+        deltas = snapshot_totals(new, factors)
+        for key, amount in snapshot_totals(old, factors, sign=-1).items():
+            deltas[key] += amount
+        apply_deltas(user_ids, deltas)
+
+
+def remove_recipes(snapshots):
+    # Вызывается после пометки рецептов удалёнными: их строки ShoppingCart
+    # уже скрыты менеджером, но остаются у живых пользователей до очистки.
+    sync_recipe_snapshots(
+        {recipe_id: (snapshot, []) for recipe_id, snapshot in snapshots.items()},
+        ShoppingCart.all_objects.filter(user__deleted_at__isnull=True),
+    )
+
+
+def users_with_unit(unit):
+    return ShoppingCart.objects.filter(
+        recipe__recipe_ingredients__ingredient__measurement_unit=unit
+    ).values_list("user_id", flat=True)
+
+
+def rebuild(user_ids=None, batch_size=BATCH_SIZE):
+    if user_ids is None:
+        user_ids = (
+            ShoppingCart.objects.order_by()
+            .values_list("user_id", flat=True)
+            .union(
+                CartIngredientTotal.objects.order_by().values_list("user_id", flat=True)
+            )
+        )
+    user_ids = sorted(set(user_ids))
+    factors = {}
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start : start + batch_size]
+        snapshots = list(
+            ShoppingCart.objects.filter(user_id__in=batch).values_list(
+                "user_id", "recipe__ingredients_snapshot"
+            )
+        )
+        missing = snapshot_units(*(snapshot for _, snapshot in snapshots)) - set(
+            factors
+        )
+        factors.update(unit_factors(missing))
+        totals = defaultdict(lambda: defaultdict(Decimal))
+        for user_id, snapshot in snapshots:
+            for key, amount in snapshot_totals(snapshot, factors).items():
+                totals[user_id][key] += amount
+        with transaction.atomic():
+            _lock_users(batch)
+            CartIngredientTotal.objects.filter(user_id__in=batch).delete()
+            CartIngredientTotal.objects.bulk_create(
+                CartIngredientTotal(
+                    user_id=user_id, name=name, measurement_unit=unit, amount=amount
+                )
+                for user_id, user_totals in totals.items()
+                for (name, unit), amount in user_totals.items()
+                if amount > 0
+            )
+    return len(user_ids)
+
+
+def shopping_list(user, targets=None):
+    totals = {
+        (name, unit): Fraction(amount)
+        for name, unit, amount in user.cart_totals.values_list(
+            "name", "measurement_unit", "amount"
+        )
+    }
+    if targets:
+        # Поправка на порции одним агрегатом: сумма amount * (цель - порции)
+        # по ингредиентам, делится на порции рецепта уже в Python без потерь.
+        target = Case(
+            *(When(recipe_id=pk, then=Value(value)) for pk, value in targets.items()),
+            output_field=IntegerField(),
+        )
+        rows = list(
+            RecipeIngredient.objects.filter(
+                recipe__in=Recipe.objects.filter(
+                    pk__in=targets, shopping_cart__user=user
+                )
+            )
+            .order_by()
+            .values_list(
+                "ingredient__name", "ingredient__measurement_unit", "recipe__servings"
+            )
+            .annotate(extra=Sum(F("amount") * (target - F("recipe__servings"))))
+        )
+        factors = unit_factors({unit for _, unit, _, _ in rows})
+        for name, unit, servings, extra in rows:
+            unit, factor = factors[unit]
+            totals[(name, unit)] = totals.get((name, unit), 0) + Fraction(
+                extra, servings
+            ) * Fraction(factor)
+    return [
+        (name, unit, round_amount(amount, unit))
+        for (name, unit), amount in totals.items()
+        if amount > 0
+    ]
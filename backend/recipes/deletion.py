@@ -0,0 +1,181 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from foodgram.fragments import fragments, profile_keys, recipe_keys
+from jobs.models import HIGH_PRIORITY
+from jobs.queue import enqueue
+from outbox.publisher import publish_many
+from users.models import Subscription, User
+from . import cart, shortlinks
+from .models import (
+    CartIngredientTotal,
+    Favorite,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+)
+
+
+def _forget_recipes(recipe_ids, using=None):
+    fragments.invalidate(
+        [key for recipe_id in recipe_ids for key in recipe_keys(recipe_id)],
+        using=using,
+    )
+    transaction.on_commit(
+        lambda: [shortlinks.forget_recipe(recipe_id) for recipe_id in recipe_ids],
+        using=using,
+    )
+
+
+def _hide_recipes(now, using=None, **lookup):
+    # Строки скрываются одним UPDATE по условию, а id для событий и сброса
+    # кешей читаются пачками: у плодовитого автора их десятки тысяч.
+    recipes = Recipe.all_objects.using(using).filter(**lookup)
+    hidden = recipes.filter(deleted_at__isnull=True).update(deleted_at=now)
+    last_id = 0
+    while hidden:
+        batch = list(
+            recipes.filter(deleted_at=now, pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", "author_id", "ingredients_snapshot")[
+                : settings.DELETION_BATCH_SIZE
+            ]
+        )
+        if not batch:
+            break
+        publish_many(
+            "recipe.deleted",
+            [
+                {"recipe_id": recipe_id, "author_id": author_id}
+                for recipe_id, author_id, _ in batch
+            ],
+            using=using,
+        )
+        cart.remove_recipes({recipe_id: snapshot for recipe_id, _, snapshot in batch})
+        _forget_recipes([recipe_id for recipe_id, *_ in batch], using=using)
+        last_id = batch[-1][0]
+    return hidden
+
+
+def _forget_favorites(user_id, using=None):
+    # Счётчики избранного пересчитываются обработчиком события уже без
+    # скрытых строк удалённого пользователя.
+    favorites = Favorite.all_objects.using(using).filter(user_id=user_id)
+    last_id = 0
+    while True:
+        batch = list(
+            favorites.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", "recipe_id")[: settings.DELETION_BATCH_SIZE]
+        )
+        if not batch:
+            return
+        publish_many(
+            "favorite.removed",
+            [{"user_id": user_id, "recipe_id": recipe_id} for _, recipe_id in batch],
+            using=using,
+        )
+        last_id = batch[-1][0]
+
+
+def delete_recipe(recipe, using=None):
+    # Рецепт сразу пропадает из выдачи, а избранное, корзины и ингредиенты
+    # удаляются фоновой задачей: у популярного рецепта их десятки тысяч.
+    now = timezone.now()
+    with transaction.atomic(using=using):
+        hidden = _hide_recipes(now, using=using, pk=recipe.pk)
+        if hidden:
+            enqueue(
+                "recipes.purge_recipe",
+                priority=HIGH_PRIORITY,
+                using=using,
+                recipe_id=recipe.pk,
+            )
+    recipe.deleted_at = now
+    return bool(hidden)
+
+
+def delete_user(user, using=None):
+    now = timezone.now()
+    with transaction.atomic(using=using):
+        hidden = (
+            User.objects.using(using).filter(pk=user.pk)
+            # Почта и имя освобождаются сразу, чтобы под ними можно было
+            # снова зарегистрироваться, не дожидаясь очистки.
+            .update(
+                deleted_at=now,
+                is_active=False,
+                email=f"deleted-{user.pk}@deleted.invalid",
+                username=f"deleted-{user.pk}",
+            )
+        )
+        if not hidden:
+            return False
+        _hide_recipes(now, using=using, author_id=user.pk)
+        _forget_favorites(user.pk, using=using)
+        Token.objects.using(using).filter(user_id=user.pk).delete()
+        fragments.invalidate(profile_keys(user.pk), using=using)
+        enqueue("recipes.purge_user", using=using, user_id=user.pk)
+    user.deleted_at = now
+    user.is_active = False
+    return True
+
+
+def delete_in_batches(queryset, batch_size=None):
+    # Каждая пачка — отдельная короткая транзакция; сигналы удаления
+    # (итоги корзин, события outbox) срабатывают как при обычном delete().
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    manager = queryset.model._base_manager.using(queryset.db)
+    deleted = 0
+    while True:
+        batch = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        with transaction.atomic(using=queryset.db):
+            deleted += manager.filter(pk__in=batch).delete()[0]
+
+
+def purge_recipe(recipe_id, batch_size=None):
+    deleted = 0
+    for model in (ShoppingCart, Favorite, RecipeIngredient):
+        deleted += delete_in_batches(
+            model._base_manager.filter(recipe_id=recipe_id), batch_size
+        )
+    with transaction.atomic():
+        recipe = (
+            Recipe.all_objects.select_for_update()
+            .filter(pk=recipe_id, deleted_at__isnull=False)
+            .first()
+        )
+        if recipe is not None:
+            deleted += recipe.delete()[0]
+    return deleted
+
+
+def purge_user(user_id, batch_size=None):
+    deleted = 0
+    for recipe_id in list(
+        Recipe.all_objects.filter(author_id=user_id)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    ):
+        deleted += purge_recipe(recipe_id, batch_size)
+    for queryset in (
+        ShoppingCart.all_objects.filter(user_id=user_id),
+        Favorite.all_objects.filter(user_id=user_id),
+        Subscription.all_objects.filter(user_id=user_id),
+        Subscription.all_objects.filter(author_id=user_id),
+        CartIngredientTotal.objects.filter(user_id=user_id),
+    ):
+        deleted += delete_in_batches(queryset, batch_size)
+    with transaction.atomic():
+        user = (
+            User.all_objects.select_for_update()
+            .filter(pk=user_id, deleted_at__isnull=False)
+            .first()
+        )
+        if user is not None:
+            deleted += user.delete()[0]
+    return deleted
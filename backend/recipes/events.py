@@ -0,0 +1,19 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from outbox.handlers import handler
+from .models import Favorite, Recipe
+
+
+@handler("favorite.added", "favorite.removed")
+def refresh_favorites_count(event):
+    favorites = (
+        Favorite.objects.filter(recipe=OuterRef("pk"))
+        .order_by()
+        .values("recipe")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Recipe.objects.filter(pk=event.payload["recipe_id"]).update(
+        favorites_count=Coalesce(Subquery(favorites), 0)
+    )
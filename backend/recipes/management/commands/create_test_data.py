@@ -116,6 +116,7 @@ class Command(BaseCommand):
                             ingredient=ingredient_data["ingredient"],
                             amount=ingredient_data["amount"],
                         )
+                    recipe.refresh_ingredients_snapshot()
 
             self.stdout.write(self.style.SUCCESS("Рецепты созданы успешно"))
         else:
@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.transfer import IMAGE_MODES, export_lines
+
+
+class Command(BaseCommand):
+    help = "Выгружает рецепты в формате JSON Lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output", nargs="?", default="-", help="Файл для выгрузки, - для stdout"
+        )
+        parser.add_argument(
+            "--images",
+            choices=IMAGE_MODES,
+            default="embed",
+            help="Встраивать изображения в base64, ссылаться на файлы в media "
+            "или не выгружать их",
+        )
+        parser.add_argument("--author", help="Выгрузить рецепты одного автора (email)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.all()
+        if options["author"]:
+            queryset = queryset.filter(author__email=options["author"])
+
+        if options["output"] == "-":
+            total = self.write(sys.stdout, queryset, options)
+        else:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                total = self.write(output, queryset, options)
+
+        self.stderr.write(self.style.SUCCESS(f"Выгружено рецептов: {total}"))
+
+    def write(self, output, queryset, options):
+        total = 0
+        for line in export_lines(
+            queryset, images=options["images"], batch_size=options["batch_size"]
+        ):
+            output.write(line)
+            output.write("\n")
+            total += 1
+        return total
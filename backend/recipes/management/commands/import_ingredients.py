@@ -4,6 +4,7 @@ import os
 from django.core.management.base import BaseCommand
 
 from recipes.models import Ingredient
+from recipes.search import ingredient_index
 
 
 class Command(BaseCommand):
@@ -30,6 +31,7 @@ class Command(BaseCommand):
                 )
 
             Ingredient.objects.bulk_create(ingredients_to_create, ignore_conflicts=True)
+            ingredient_index.invalidate()
 
             self.stdout.write(
                 self.style.SUCCESS(
@@ -0,0 +1,58 @@
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.transfer import RecipeImporter
+
+
+class Command(BaseCommand):
+    help = "Загружает рецепты из файла JSON Lines пакетами"
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="Файл JSON Lines, - для stdin")
+        parser.add_argument(
+            "--author",
+            help="Email автора для записей, в которых автор не указан",
+        )
+        parser.add_argument(
+            "--create-ingredients",
+            action="store_true",
+            help="Создавать отсутствующие ингредиенты",
+        )
+        parser.add_argument(
+            "--media-root",
+            default=settings.MEDIA_ROOT,
+            help="Каталог, относительно которого ищутся изображения по ссылке",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество рецептов в одной транзакции",
+        )
+
+    def handle(self, *args, **options):
+        importer = RecipeImporter(
+            default_author=options["author"],
+            create_ingredients=options["create_ingredients"],
+            media_root=options["media_root"],
+            batch_size=options["batch_size"],
+        )
+        started = time.monotonic()
+        if options["input"] == "-":
+            importer.run(sys.stdin)
+        else:
+            with open(options["input"], encoding="utf-8") as lines:
+                importer.run(lines)
+
+        for number, error in importer.errors:
+            self.stderr.write(self.style.ERROR(f"Строка {number}: {error}"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Загружено рецептов: {importer.imported}, "
+                f"пропущено: {len(importer.errors)}, "
+                f"время: {time.monotonic() - started:.1f} с"
+            )
+        )
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.models import FINISHED, Job
+from jobs.queue import enqueue
+from recipes import deletion
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Ставит в очередь очистку пользователей и рецептов, которые удалены "
+        "давно, но так и не были вычищены (например, задача исчерпала попытки)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=settings.DELETION_STALE_AFTER,
+            help="Сколько секунд назад строка должна быть удалена",
+        )
+        parser.add_argument(
+            "--now",
+            action="store_true",
+            help="Очистить в текущем процессе, не ставя задачи в очередь",
+        )
+
+    def handle(self, *args, **options):
+        deleted_before = timezone.now() - timedelta(seconds=options["older_than"])
+        users = list(
+            User.all_objects.filter(deleted_at__lt=deleted_before).values_list(
+                "pk", flat=True
+            )
+        )
+        # Рецепты удалённых пользователей вычистит очистка самого пользователя.
+        recipes = list(
+            Recipe.all_objects.filter(deleted_at__lt=deleted_before)
+            .exclude(author_id__in=users)
+            .values_list("pk", flat=True)
+        )
+        for kind, key, ids, purge in (
+            ("recipes.purge_recipe", "recipe_id", recipes, deletion.purge_recipe),
+            ("recipes.purge_user", "user_id", users, deletion.purge_user),
+        ):
+            if options["now"]:
+                for pk in ids:
+                    purge(pk)
+                continue
+            pending = {
+                payload.get(key)
+                for payload in Job.objects.filter(kind=kind)
+                .exclude(status__in=FINISHED)
+                .values_list("payload", flat=True)
+            }
+            for pk in ids:
+                if pk not in pending:
+                    enqueue(kind, **{key: pk})
+
+        action = "Очищено" if options["now"] else "Поставлено в очередь"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action}: пользователей {len(users)}, рецептов {len(recipes)}"
+            )
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from recipes import cart
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает итоги списков покупок пользователей пакетами"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="Пересчитать только указанных пользователей",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=cart.BATCH_SIZE,
+            help="Количество пользователей, пересчитываемых за одну транзакцию",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            total = cart.rebuild(options["users"], batch_size=options["batch_size"])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Пересчитаны итоги списков покупок: {total} пользователей"
+                )
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f"Ошибка при пересчёте списков покупок: {e}")
+            )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Пересобирает снимки ингредиентов рецептов пакетами"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Количество рецептов, обновляемых за один запрос",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            total = Recipe.objects.all().rebuild_ingredients_snapshots(
+                batch_size=options["batch_size"]
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f"Обновлены снимки ингредиентов: {total} рецептов")
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f"Ошибка при обновлении снимков ингредиентов: {e}")
+            )
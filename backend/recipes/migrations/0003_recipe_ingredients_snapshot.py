@@ -0,0 +1,59 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:24
+
+from django.db import migrations, models
+
+
+def fill_ingredients_snapshot(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    snapshots = {}
+    for (
+        recipe_id,
+        ingredient_id,
+        name,
+        measurement_unit,
+        amount,
+    ) in RecipeIngredient.objects.order_by("recipe_id", "id").values_list(
+        "recipe_id",
+        "ingredient_id",
+        "ingredient__name",
+        "ingredient__measurement_unit",
+        "amount",
+    ):
+        snapshots.setdefault(recipe_id, []).append(
+            {
+                "id": ingredient_id,
+                "name": name,
+                "measurement_unit": measurement_unit,
+                "amount": amount,
+            }
+        )
+    Recipe.objects.bulk_update(
+        [
+            Recipe(pk=recipe_id, ingredients_snapshot=snapshot)
+            for recipe_id, snapshot in snapshots.items()
+        ],
+        ["ingredients_snapshot"],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="ingredients_snapshot",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                editable=False,
+                verbose_name="Снимок ингредиентов",
+            ),
+        ),
+        migrations.RunPython(fill_ingredients_snapshot, migrations.RunPython.noop),
+    ]
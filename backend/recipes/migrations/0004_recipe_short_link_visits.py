@@ -0,0 +1,20 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0003_recipe_ingredients_snapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="short_link_visits",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Переходы по короткой ссылке"
+            ),
+        ),
+    ]
@@ -0,0 +1,152 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:41
+
+from decimal import Decimal
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+UNIT_CONVERSIONS = [
+    ("кг", "г", Decimal("1000")),
+    ("мг", "г", Decimal("0.001")),
+    ("л", "мл", Decimal("1000")),
+]
+
+
+def fill_unit_conversions(apps, schema_editor):
+    UnitConversion = apps.get_model("recipes", "UnitConversion")
+    UnitConversion.objects.bulk_create(
+        [
+            UnitConversion(unit=unit, canonical_unit=canonical_unit, factor=factor)
+            for unit, canonical_unit, factor in UNIT_CONVERSIONS
+        ]
+    )
+
+
+def fill_cart_totals(apps, schema_editor):
+    ShoppingCart = apps.get_model("recipes", "ShoppingCart")
+    CartIngredientTotal = apps.get_model("recipes", "CartIngredientTotal")
+    factors = {
+        unit: (canonical_unit, factor)
+        for unit, canonical_unit, factor in UNIT_CONVERSIONS
+    }
+    totals = {}
+    for user_id, snapshot in ShoppingCart.objects.values_list(
+        "user_id", "recipe__ingredients_snapshot"
+    ).iterator():
+        for item in snapshot:
+            unit, factor = factors.get(
+                item["measurement_unit"], (item["measurement_unit"], Decimal(1))
+            )
+            key = (user_id, item["name"], unit)
+            totals[key] = totals.get(key, Decimal(0)) + Decimal(item["amount"]) * factor
+    CartIngredientTotal.objects.bulk_create(
+        [
+            CartIngredientTotal(
+                user_id=user_id, name=name, measurement_unit=unit, amount=amount
+            )
+            for (user_id, name, unit), amount in totals.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0004_recipe_short_link_visits"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UnitConversion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "unit",
+                    models.CharField(
+                        max_length=64, unique=True, verbose_name="Единица измерения"
+                    ),
+                ),
+                (
+                    "canonical_unit",
+                    models.CharField(max_length=64, verbose_name="Базовая единица"),
+                ),
+                (
+                    "factor",
+                    models.DecimalField(
+                        decimal_places=6,
+                        max_digits=12,
+                        validators=[
+                            django.core.validators.MinValueValidator(
+                                Decimal("0.000001")
+                            )
+                        ],
+                        verbose_name="Множитель",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Перевод единиц",
+                "verbose_name_plural": "Переводы единиц",
+                "ordering": ["unit"],
+            },
+        ),
+        migrations.CreateModel(
+            name="CartIngredientTotal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=128, verbose_name="Название")),
+                (
+                    "measurement_unit",
+                    models.CharField(max_length=64, verbose_name="Единица измерения"),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=6, max_digits=16, verbose_name="Количество"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cart_totals",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Итог списка покупок",
+                "verbose_name_plural": "Итоги списков покупок",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="cartingredienttotal",
+            constraint=models.UniqueConstraint(
+                fields=("user", "name", "measurement_unit"),
+                name="unique_cart_ingredient_total",
+            ),
+        ),
+        migrations.RunPython(fill_unit_conversions, migrations.RunPython.noop),
+        migrations.RunPython(fill_cart_totals, migrations.RunPython.noop),
+    ]
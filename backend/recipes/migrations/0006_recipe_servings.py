@@ -0,0 +1,26 @@
+# Generated by Django 3.2.16 on 2026-10-19 09:43
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0005_unit_conversion_cart_totals"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="servings",
+            field=models.PositiveSmallIntegerField(
+                default=1,
+                validators=[
+                    django.core.validators.MinValueValidator(1),
+                    django.core.validators.MaxValueValidator(100),
+                ],
+                verbose_name="Количество порций",
+            ),
+        ),
+    ]
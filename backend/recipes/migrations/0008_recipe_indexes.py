@@ -0,0 +1,56 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:04
+
+from django.db import migrations, models
+
+# Django 3.2 не умеет задавать класс операторов для индекса по выражению,
+# поэтому индексы для поиска по префиксу создаются SQL и только в PostgreSQL.
+# startswith даёт "name"::text LIKE 'abc%', istartswith —
+# UPPER("name"::text) LIKE UPPER('abc%'); без *_pattern_ops индекс для LIKE
+# не используется, если база создана не с локалью C.
+INGREDIENT_INDEXES = (
+    (
+        "ingredient_name_like_idx",
+        "CREATE INDEX IF NOT EXISTS ingredient_name_like_idx "
+        "ON recipes_ingredient (name varchar_pattern_ops)",
+    ),
+    (
+        "ingredient_name_upper_idx",
+        "CREATE INDEX IF NOT EXISTS ingredient_name_upper_idx "
+        "ON recipes_ingredient (UPPER(name::text) text_pattern_ops)",
+    ),
+)
+
+
+def create_ingredient_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for _, sql in INGREDIENT_INDEXES:
+        schema_editor.execute(sql)
+
+
+def drop_ingredient_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _ in INGREDIENT_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0007_recipe_favorites_count"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(fields=["-pub_date"], name="recipe_pub_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["author", "-pub_date"], name="recipe_author_pub_date_idx"
+            ),
+        ),
+        migrations.RunPython(create_ingredient_indexes, drop_ingredient_indexes),
+    ]
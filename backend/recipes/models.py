@@ -1,8 +1,11 @@
-from django.core.validators import MinValueValidator
-from django.db import models
+from decimal import Decimal
+
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
 from django.conf import settings
 
-from users.models import User
+from foodgram.fragments import fragments, recipe_ingredients_key
+from users.models import LinkManager, User
 
 
 class Ingredient(models.Model):
@@ -28,6 +31,76 @@ class Ingredient(models.Model):
         return f"{self.name}, {self.measurement_unit}"
 
 
+def build_ingredients_snapshot(rows):
+    return [
+        {
+            "id": ingredient_id,
+            "name": name,
+            "measurement_unit": measurement_unit,
+            "amount": amount,
+        }
+        for ingredient_id, name, measurement_unit, amount in rows
+    ]
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def rebuild_ingredients_snapshots(self, batch_size=500):
+        from .cart import sync_recipe_snapshots
+
+        recipe_ids = list(self.order_by("pk").values_list("pk", flat=True))
+        for start in range(0, len(recipe_ids), batch_size):
+            batch_ids = recipe_ids[start : start + batch_size]
+            # Снимки и суммы корзин пачки меняются вместе.
+            with transaction.atomic():
+                old_snapshots = dict(
+                    Recipe.objects.filter(pk__in=batch_ids).values_list(
+                        "pk", "ingredients_snapshot"
+                    )
+                )
+                rows = {recipe_id: [] for recipe_id in batch_ids}
+                for recipe_id, *row in (
+                    RecipeIngredient.objects.filter(recipe_id__in=batch_ids)
+                    .order_by("recipe_id", "id")
+                    .values_list(
+                        "recipe_id",
+                        "ingredient_id",
+                        "ingredient__name",
+                        "ingredient__measurement_unit",
+                        "amount",
+                    )
+                ):
+                    rows[recipe_id].append(row)
+                snapshots = {
+                    recipe_id: build_ingredients_snapshot(recipe_rows)
+                    for recipe_id, recipe_rows in rows.items()
+                }
+                Recipe.objects.bulk_update(
+                    [
+                        Recipe(pk=recipe_id, ingredients_snapshot=snapshot)
+                        for recipe_id, snapshot in snapshots.items()
+                    ],
+                    ["ingredients_snapshot"],
+                )
+                fragments.invalidate(
+                    recipe_ingredients_key(recipe_id) for recipe_id in batch_ids
+                )
+                sync_recipe_snapshots(
+                    {
+                        recipe_id: (old_snapshots.get(recipe_id, []), snapshot)
+                        for recipe_id, snapshot in snapshots.items()
+                    }
+                )
+        return len(recipe_ids)
+
+
+class RecipeManager(models.Manager.from_queryset(RecipeQuerySet)):
+    # Удалённые рецепты скрыты сразу, а сами строки и зависимые от них
+    # удаляет фоновая задача recipes.purge_recipe.
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Recipe(models.Model):
     name = models.CharField(
         max_length=settings.MAX_RECIPE_NAME_LENGTH, verbose_name="Название"
@@ -40,6 +113,14 @@ class Recipe(models.Model):
         validators=[MinValueValidator(settings.MIN_COOKING_TIME)],
         verbose_name="Время приготовления (в минутах)",
     )
+    servings = models.PositiveSmallIntegerField(
+        default=settings.DEFAULT_SERVINGS,
+        validators=[
+            MinValueValidator(settings.MIN_SERVINGS),
+            MaxValueValidator(settings.MAX_SERVINGS),
+        ],
+        verbose_name="Количество порций",
+    )
     image = models.ImageField(
         upload_to="recipes/images/",
         verbose_name="Изображение",
@@ -49,15 +130,61 @@ class Recipe(models.Model):
         Ingredient, through="RecipeIngredient", verbose_name="Ингредиенты"
     )
     pub_date = models.DateTimeField(auto_now_add=True, verbose_name="Дата публикации")
+    ingredients_snapshot = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        verbose_name="Снимок ингредиентов",
+    )
+    short_link_visits = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Переходы по короткой ссылке",
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="В избранном"
+    )
+    deleted_at = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name="Удалён"
+    )
+
+    objects = RecipeManager()
+    all_objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(fields=["-pub_date"], name="recipe_pub_date_idx"),
+            models.Index(
+                fields=["author", "-pub_date"], name="recipe_author_pub_date_idx"
+            ),
+            models.Index(
+                fields=["deleted_at"],
+                name="recipe_deleted_at_idx",
+                condition=models.Q(deleted_at__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def refresh_ingredients_snapshot(self):
+        from .cart import sync_recipe_snapshots
+
+        old_snapshot = self.ingredients_snapshot
+        self.ingredients_snapshot = build_ingredients_snapshot(
+            self.recipe_ingredients.order_by("id").values_list(
+                "ingredient_id",
+                "ingredient__name",
+                "ingredient__measurement_unit",
+                "amount",
+            )
+        )
+        self.save(update_fields=["ingredients_snapshot"])
+        sync_recipe_snapshots({self.pk: (old_snapshot, self.ingredients_snapshot)})
+
 
 class RecipeIngredient(models.Model):
     recipe = models.ForeignKey(
@@ -90,6 +217,10 @@ class RecipeIngredient(models.Model):
         return f"{self.ingredient} в {self.recipe}"
 
 
+class UserRecipeManager(LinkManager):
+    links = ("user", "recipe")
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(
         User,
@@ -104,6 +235,9 @@ class Favorite(models.Model):
         verbose_name="Рецепт",
     )
 
+    objects = UserRecipeManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name = "Избранное"
         verbose_name_plural = "Избранное"
@@ -129,6 +263,9 @@ class ShoppingCart(models.Model):
         verbose_name="Рецепт",
     )
 
+    objects = UserRecipeManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name = "Список покупок"
         verbose_name_plural = "Списки покупок"
@@ -140,3 +277,62 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f"{self.user} добавил {self.recipe} в список покупок"
+
+
+class UnitConversion(models.Model):
+    unit = models.CharField(
+        max_length=settings.MAX_INGREDIENT_MEASUREMENT_UNIT_LENGTH,
+        unique=True,
+        verbose_name="Единица измерения",
+    )
+    canonical_unit = models.CharField(
+        max_length=settings.MAX_INGREDIENT_MEASUREMENT_UNIT_LENGTH,
+        verbose_name="Базовая единица",
+    )
+    factor = models.DecimalField(
+        max_digits=12,
+        decimal_places=6,
+        validators=[MinValueValidator(Decimal("0.000001"))],
+        verbose_name="Множитель",
+    )
+
+    class Meta:
+        verbose_name = "Перевод единиц"
+        verbose_name_plural = "Переводы единиц"
+        ordering = ["unit"]
+
+    def __str__(self):
+        return f"1 {self.unit} = {self.factor.normalize():f} {self.canonical_unit}"
+
+
+class CartIngredientTotal(models.Model):
+    user = models.ForeignKey(
+        User,
+        related_name="cart_totals",
+        on_delete=models.CASCADE,
+        verbose_name="Пользователь",
+    )
+    name = models.CharField(
+        max_length=settings.MAX_INGREDIENT_NAME_LENGTH, verbose_name="Название"
+    )
+    measurement_unit = models.CharField(
+        max_length=settings.MAX_INGREDIENT_MEASUREMENT_UNIT_LENGTH,
+        verbose_name="Единица измерения",
+    )
+    amount = models.DecimalField(
+        max_digits=16, decimal_places=6, verbose_name="Количество"
+    )
+
+    class Meta:
+        verbose_name = "Итог списка покупок"
+        verbose_name_plural = "Итоги списков покупок"
+        ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name", "measurement_unit"],
+                name="unique_cart_ingredient_total",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.measurement_unit}) — {self.amount}"
@@ -0,0 +1,92 @@
+import math
+from fractions import Fraction
+
+from django.conf import settings
+
+COUNTABLE_UNITS = {
+    "шт.",
+    "банка",
+    "батон",
+    "бутылка",
+    "веточка",
+    "головка",
+    "зубчик",
+    "кусок",
+    "пакет",
+    "пачка",
+    "пучок",
+    "упаковка",
+}
+ROUNDING_STEPS = {
+    "г": Fraction(1),
+    "мл": Fraction(1),
+    "кг": Fraction(1, 100),
+    "л": Fraction(1, 100),
+    "ст. л.": Fraction(1, 2),
+    "ч. л.": Fraction(1, 4),
+    "стакан": Fraction(1, 4),
+    "капля": Fraction(1),
+    "щепотка": Fraction(1),
+    "горсть": Fraction(1, 2),
+}
+DEFAULT_ROUNDING_STEP = Fraction(1, 10)
+
+
+class InvalidServings(ValueError):
+    pass
+
+
+def parse_servings(value):
+    try:
+        servings = int(value)
+    except (TypeError, ValueError):
+        raise InvalidServings(f"Количество порций должно быть целым числом: {value}")
+    if not settings.MIN_SERVINGS <= servings <= settings.MAX_SERVINGS:
+        raise InvalidServings(
+            f"Количество порций должно быть от {settings.MIN_SERVINGS} "
+            f"до {settings.MAX_SERVINGS}"
+        )
+    return servings
+
+
+def parse_recipe_servings(values):
+    targets = {}
+    for value in values:
+        for item in filter(None, (part.strip() for part in value.split(","))):
+            recipe_id, separator, servings = item.partition(":")
+            if not separator or not recipe_id.isdigit():
+                raise InvalidServings(
+                    f"Ожидается формат <id рецепта>:<порции>, получено: {item}"
+                )
+            targets[int(recipe_id)] = parse_servings(servings)
+    return targets
+
+
+def round_amount(amount, unit):
+    if amount <= 0:
+        return Fraction(0)
+    if unit in COUNTABLE_UNITS:
+        return Fraction(math.ceil(amount))
+    step = ROUNDING_STEPS.get(unit, DEFAULT_ROUNDING_STEP)
+    return max(math.floor(amount / step + Fraction(1, 2)), 1) * step
+
+
+def as_number(amount):
+    if amount.denominator == 1:
+        return amount.numerator
+    return float(amount)
+
+
+def scale_snapshot(snapshot, servings, target):
+    if target == servings:
+        return snapshot
+    factor = Fraction(target, servings)
+    return [
+        {
+            **item,
+            "amount": as_number(
+                round_amount(item["amount"] * factor, item["measurement_unit"])
+            ),
+        }
+        for item in snapshot
+    ]
@@ -0,0 +1,211 @@
+import bisect
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+
+MIN_FUZZY_LENGTH = 3
+
+
+def normalize(value):
+    return " ".join(value.lower().replace("ё", "е").split())
+
+
+def trigrams(value):
+    # Как в pg_trgm: слово дополняется двумя пробелами слева и одним справа.
+    grams = set()
+    for word in value.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def prefix_distance(query, name, limit):
+    # Расстояние Дамерау — Левенштейна (с перестановкой соседних букв) от
+    # запроса до ближайшего префикса названия; None, если оно больше limit.
+    # Считается только полоса |i - j| <= limit, за её пределами всё равно
+    # больше limit.
+    name = name[: len(query) + limit]
+    infinity = limit + 1
+    before = None
+    previous = [min(j, infinity) for j in range(len(name) + 1)]
+    for i in range(1, len(query) + 1):
+        current = [i if i <= limit else infinity] + [infinity] * len(name)
+        best = current[0]
+        char = query[i - 1]
+        for j in range(max(1, i - limit), min(len(name), i + limit) + 1):
+            value = previous[j - 1] + (char != name[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (
+                before is not None
+                and j > 1
+                and char == name[j - 2]
+                and query[i - 2] == name[j - 1]
+                and before[j - 2] + 1 < value
+            ):
+                value = before[j - 2] + 1
+            current[j] = value
+            if value < best:
+                best = value
+        if best > limit:
+            return None
+        before, previous = previous, current
+    return min(previous)
+
+
+class IngredientIndex:
+
+    def __init__(self, entries):
+        self.names = {}
+        self.grams = {}
+        self.postings = defaultdict(list)
+        ordered = []
+        for pk, name in entries:
+            normalized = normalize(name)
+            grams = trigrams(normalized)
+            self.names[pk] = normalized
+            self.grams[pk] = grams
+            for gram in grams:
+                self.postings[gram].append(pk)
+            ordered.append((normalized, pk))
+        ordered.sort()
+        self.keys = [name for name, _ in ordered]
+        self.pks = [pk for _, pk in ordered]
+
+    def search(self, query, limit):
+        query = normalize(query)
+        if not query:
+            return []
+
+        # Точное совпадение и префиксы: в отсортированном списке они идут
+        # подряд, причём точное — первым.
+        found = []
+        position = bisect.bisect_left(self.keys, query)
+        while (
+            len(found) < limit
+            and position < len(self.keys)
+            and self.keys[position].startswith(query)
+        ):
+            found.append(self.pks[position])
+            position += 1
+        if len(found) >= limit or len(query) < MIN_FUZZY_LENGTH:
+            return found
+
+        grams = trigrams(query)
+        threshold = settings.INGREDIENT_SEARCH_THRESHOLD
+        max_distance = min(settings.INGREDIENT_SEARCH_MAX_DISTANCE, len(query) // 5)
+        # Сколько триграмм запроса обязательно есть у подходящего названия:
+        # для сходства не меньше threshold — threshold * len(grams), а каждая
+        # правка портит не больше трёх триграмм и ещё одну, последнюю, теряет
+        # совпадение с префиксом.
+        required = math.ceil(threshold * len(grams))
+        fuzzy_required = len(grams) - 3 * max_distance - 1
+        if max_distance:
+            required = min(required, fuzzy_required)
+        required = max(required, 1)
+        # Значит, название встречается хотя бы в одном из
+        # len(grams) - required + 1 самых редких списков.
+        rare = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())))
+        candidates = set()
+        for gram in rare[: len(grams) - required + 1]:
+            candidates.update(self.postings.get(gram, ()))
+        candidates.difference_update(found)
+
+        scored = []
+        for pk in candidates:
+            shared = len(grams & self.grams[pk])
+            if shared < required:
+                continue
+            score = shared / (len(grams) + len(self.grams[pk]) - shared)
+            name = self.names[pk]
+            if (
+                max_distance
+                and shared >= fuzzy_required
+                and len(grams & trigrams(name[: len(query) + max_distance]))
+                >= fuzzy_required
+            ):
+                distance = prefix_distance(query, name, max_distance)
+                if distance is not None:
+                    score = max(score, 1 - distance / len(query))
+            if score >= threshold:
+                scored.append((-score, name, pk))
+        scored.sort()
+        return found + [pk for _, _, pk in scored[: limit - len(found)]]
+
+
+class IndexCache:
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._index = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._index is None or time.monotonic() - self._built_at > self.ttl:
+                from .models import Ingredient
+
+                self._index = IngredientIndex(
+                    Ingredient.objects.values_list("pk", "name").iterator()
+                )
+                self._built_at = time.monotonic()
+            return self._index
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+
+ingredient_index = IndexCache(settings.INGREDIENT_SEARCH_INDEX_TTL)
+
+
+def use_trigram(queryset):
+    backend = settings.INGREDIENT_SEARCH_BACKEND
+    if backend == "auto":
+        return connections[queryset.db].vendor == "postgresql"
+    return backend == "trigram"
+
+
+def search_ingredients(queryset, query, limit=None):
+    limit = limit or settings.INGREDIENT_SEARCH_LIMIT
+    query = query.strip()
+    if use_trigram(queryset):
+        return trigram_search(queryset, query, limit)
+
+    pks = ingredient_index.get().search(query, limit)
+    if not pks:
+        return queryset.none()
+    return queryset.filter(pk__in=pks).order_by(
+        Case(
+            *(When(pk=pk, then=Value(position)) for position, pk in enumerate(pks)),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def trigram_search(queryset, query, limit):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    # % и istartswith обслуживаются индексами ingredient_name_trgm_idx и
+    # ingredient_name_upper_idx.
+    return (
+        queryset.filter(Q(name__istartswith=query) | Q(name__trigram_similar=query))
+        .annotate(
+            rank=Case(
+                When(name__iexact=query, then=Value(0)),
+                When(name__istartswith=query, then=Value(1)),
+                default=Value(2),
+                output_field=IntegerField(),
+            ),
+            similarity=TrigramSimilarity("name", query),
+        )
+        .order_by("rank", "-similarity", "name")[:limit]
+    )
@@ -0,0 +1,174 @@
+import atexit
+import hashlib
+import hmac
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, close_old_connections
+from django.db.models import Case, F, Value, When
+
+logger = logging.getLogger("foodgram.shortlinks")
+
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+HALF_BITS = 20
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 4
+MAX_RECIPE_ID = (1 << (2 * HALF_BITS)) - 1
+
+
+def _key(purpose):
+    return hashlib.sha256(
+        f"{settings.SECRET_KEY}:short-link:{purpose}".encode()
+    ).digest()
+
+
+def _round(value, round_number):
+    digest = hmac.new(
+        _key("feistel"), f"{round_number}:{value}".encode(), hashlib.sha256
+    ).digest()
+    return int.from_bytes(digest[:4], "big") & HALF_MASK
+
+
+def _permute(number, rounds):
+    left, right = number >> HALF_BITS, number & HALF_MASK
+    for round_number in rounds:
+        left, right = right, left ^ _round(right, round_number)
+    return (right << HALF_BITS) | left
+
+
+def _to_base62(number):
+    digits = []
+    while True:
+        number, remainder = divmod(number, 62)
+        digits.append(ALPHABET[remainder])
+        if not number:
+            return "".join(reversed(digits))
+
+
+def _checksum(payload, legacy=False):
+    digest = hmac.new(_key("checksum"), payload.encode(), hashlib.sha256).digest()
+    # Код из одних цифр можно спутать со старой ссылкой /s/<id>/, поэтому у
+    # цифрового payload контрольный символ всегда буква.
+    if payload.isdigit() and not legacy:
+        return ALPHABET[10 + digest[0] % 52]
+    return ALPHABET[digest[0] % 62]
+
+
+def encode(recipe_id):
+    if not 0 < recipe_id <= MAX_RECIPE_ID:
+        raise ValueError(f"Идентификатор рецепта вне диапазона: {recipe_id}")
+    payload = _to_base62(_permute(recipe_id, range(ROUNDS)))
+    return payload + _checksum(payload)
+
+
+def decode(code):
+    if not 2 <= len(code) <= 8 or any(char not in ALPHABET for char in code):
+        return None
+    payload, checksum = code[:-1], code[-1]
+    expected = [_checksum(payload)]
+    if payload.isdigit():
+        # Такие коды выдавались до того, как контрольный символ стал буквой.
+        expected.append(_checksum(payload, legacy=True))
+    if not any(hmac.compare_digest(value, checksum) for value in expected):
+        return None
+    number = 0
+    for char in payload:
+        number = number * 62 + ALPHABET.index(char)
+    if number > MAX_RECIPE_ID:
+        return None
+    recipe_id = _permute(number, reversed(range(ROUNDS)))
+    return recipe_id or None
+
+
+def _exists_key(recipe_id):
+    return f"short-link:recipe:{recipe_id}"
+
+
+def recipe_exists(recipe_id):
+    from .models import Recipe
+
+    key = _exists_key(recipe_id)
+    exists = cache.get(key)
+    if exists is None:
+        exists = Recipe.objects.filter(pk=recipe_id).exists()
+        cache.set(
+            key,
+            exists,
+            (
+                settings.SHORT_LINK_CACHE_TIMEOUT
+                if exists
+                else settings.SHORT_LINK_MISS_TIMEOUT
+            ),
+        )
+    return exists
+
+
+def forget_recipe(recipe_id):
+    cache.delete(_exists_key(recipe_id))
+
+
+class VisitCounter:
+    # Переходы копятся в памяти процесса и сохраняются фоновым потоком:
+    # редирект не ждёт UPDATE, а ошибка базы не теряет накопленное.
+
+    def __init__(self, flush_size, flush_interval):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._counts = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher_pid = None
+
+    def record(self, recipe_id):
+        with self._lock:
+            self._counts[recipe_id] = self._counts.get(recipe_id, 0) + 1
+            self._pending += 1
+            # После fork потока в процессе нет, воркер запускает свой.
+            if self._flusher_pid != os.getpid():
+                self._flusher_pid = os.getpid()
+                threading.Thread(
+                    target=self._run, name="short-link-visits", daemon=True
+                ).start()
+            due = self._pending >= self.flush_size
+        if due:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            close_old_connections()
+
+    def flush(self):
+        from .models import Recipe
+
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            self._pending = 0
+        if not counts:
+            return
+        try:
+            Recipe.objects.filter(pk__in=counts).update(
+                short_link_visits=F("short_link_visits")
+                + Case(
+                    *(When(pk=pk, then=Value(count)) for pk, count in counts.items()),
+                    default=Value(0),
+                )
+            )
+        except DatabaseError:
+            logger.exception("Не удалось сохранить переходы по коротким ссылкам")
+            # Повтор — по таймеру, а не на каждом следующем переходе.
+            with self._lock:
+                for pk, count in counts.items():
+                    self._counts[pk] = self._counts.get(pk, 0) + count
+
+
+visit_counter = VisitCounter(
+    settings.SHORT_LINK_VISITS_FLUSH_SIZE, settings.SHORT_LINK_VISITS_FLUSH_INTERVAL
+)
+atexit.register(visit_counter.flush)
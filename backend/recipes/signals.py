@@ -0,0 +1,146 @@
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from foodgram import storage
+from foodgram.fragments import fragments, recipe_keys
+from outbox.publisher import publish
+from . import cart, shortlinks
+from .search import ingredient_index
+from .models import Favorite, Ingredient, Recipe, ShoppingCart, UnitConversion
+
+
+@receiver(post_save, sender=Ingredient)
+def refresh_snapshots_on_ingredient_change(sender, instance, created, **kwargs):
+    if created or kwargs.get("raw"):
+        return
+    Recipe.objects.filter(
+        recipe_ingredients__ingredient=instance
+    ).rebuild_ingredients_snapshots()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    ingredient_index.invalidate()
+
+
+@receiver(pre_delete, sender=Ingredient)
+def remember_ingredient_recipes(sender, instance, **kwargs):
+    instance._snapshot_recipe_ids = list(
+        Recipe.objects.filter(recipe_ingredients__ingredient=instance).values_list(
+            "pk", flat=True
+        )
+    )
+
+
+@receiver(post_delete, sender=Ingredient)
+def refresh_snapshots_on_ingredient_delete(sender, instance, **kwargs):
+    recipe_ids = getattr(instance, "_snapshot_recipe_ids", None)
+    if recipe_ids:
+        Recipe.objects.filter(pk__in=recipe_ids).rebuild_ingredients_snapshots()
+
+
+@receiver(post_delete, sender=Recipe)
+def forget_deleted_recipe_short_link(sender, instance, **kwargs):
+    shortlinks.forget_recipe(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_recipe_fragments(
+    sender, instance, raw=False, using=None, update_fields=None, **kwargs
+):
+    if not raw:
+        fragments.invalidate(recipe_keys(instance.pk, update_fields), using=using)
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_deleted_recipe_fragments(sender, instance, using=None, **kwargs):
+    fragments.invalidate(recipe_keys(instance.pk), using=using)
+
+
+@receiver(post_save, sender=Recipe)
+def publish_recipe_saved(
+    sender, instance, created, raw=False, using=None, update_fields=None, **kwargs
+):
+    # Пересборка снимка ингредиентов — производные данные, не изменение рецепта.
+    if not raw and update_fields != frozenset({"ingredients_snapshot"}):
+        publish(
+            "recipe.created" if created else "recipe.updated",
+            using=using,
+            recipe_id=instance.pk,
+            author_id=instance.author_id,
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def publish_recipe_deleted(sender, instance, using=None, **kwargs):
+    # Для мягко удалённого рецепта событие уже отправлено при скрытии.
+    if instance.deleted_at is not None:
+        return
+    publish(
+        "recipe.deleted",
+        using=using,
+        recipe_id=instance.pk,
+        author_id=instance.author_id,
+    )
+
+
+@receiver(post_save, sender=Favorite)
+def publish_favorite_added(sender, instance, created, raw=False, using=None, **kwargs):
+    if created and not raw:
+        publish(
+            "favorite.added",
+            using=using,
+            user_id=instance.user_id,
+            recipe_id=instance.recipe_id,
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def publish_favorite_removed(sender, instance, using=None, **kwargs):
+    publish(
+        "favorite.removed",
+        using=using,
+        user_id=instance.user_id,
+        recipe_id=instance.recipe_id,
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_recipe_to_cart_totals(sender, instance, created, **kwargs):
+    if created and not kwargs.get("raw"):
+        cart.add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_recipe_from_cart_totals(sender, instance, **kwargs):
+    cart.remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_save, sender=UnitConversion)
+def remember_converted_unit(sender, instance, **kwargs):
+    instance._previous_unit = (
+        UnitConversion.objects.filter(pk=instance.pk)
+        .values_list("unit", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=UnitConversion)
+@receiver(post_delete, sender=UnitConversion)
+def rebuild_cart_totals_on_conversion_change(sender, instance, **kwargs):
+    if kwargs.get("raw"):
+        return
+    units = {instance.unit, getattr(instance, "_previous_unit", None)} - {None}
+    cart.rebuild(user_id for unit in units for user_id in cart.users_with_unit(unit))
+
+
+post_init.connect(storage.remember_stored_files, sender=Recipe)
+post_save.connect(storage.release_replaced_files, sender=Recipe)
+post_delete.connect(storage.release_deleted_files, sender=Recipe)
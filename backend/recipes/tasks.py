@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from jobs.registry import task
+from . import deletion
+from .models import Favorite, Recipe
+
+RECOUNT_BATCH_SIZE = 1000
+
+
+@task("recipes.recount_favorites")
+def recount_favorites(job):
+    recipes = Recipe.objects.order_by("pk")
+    if job.payload.get("recipe_ids") is not None:
+        recipes = recipes.filter(pk__in=job.payload["recipe_ids"])
+    favorites = (
+        Favorite.objects.filter(recipe=OuterRef("pk"))
+        .order_by()
+        .values("recipe")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    recipe_ids = list(recipes.values_list("pk", flat=True))
+    for start in range(0, len(recipe_ids), RECOUNT_BATCH_SIZE):
+        with transaction.atomic():
+            Recipe.objects.filter(
+                pk__in=recipe_ids[start : start + RECOUNT_BATCH_SIZE]
+            ).update(favorites_count=Coalesce(Subquery(favorites), Value(0)))
+    return {"recipes": len(recipe_ids)}
+
+
+@task("recipes.purge_recipe")
+def purge_recipe(job):
+    return {"deleted": deletion.purge_recipe(job.payload["recipe_id"])}
+
+
+@task("recipes.purge_user")
+def purge_user(job):
+    return {"deleted": deletion.purge_user(job.payload["user_id"])}
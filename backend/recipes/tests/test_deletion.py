@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from outbox.models import OutboxEvent
+from recipes.deletion import delete_recipe, delete_user
+from recipes.models import Recipe
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def author():
+    return User.objects.create_user(
+        username="author",
+        email="author@example.com",
+        password="pass12345!",
+        first_name="Author",
+        last_name="Author",
+    )
+
+
+@pytest.fixture
+def recipes(author):
+    # Больше, чем SQLite принимает параметров в одном запросе.
+    Recipe.objects.bulk_create(
+        Recipe(author=author, name=f"Рецепт {number}", text="-", cooking_time=5)
+        for number in range(1, 1201)
+    )
+    return Recipe.objects.filter(author=author)
+
+
+def test_delete_user_hides_recipes_in_batches(settings, author, recipes):
+    settings.DELETION_BATCH_SIZE = 500
+    recipe_ids = set(recipes.values_list("pk", flat=True))
+    with CaptureQueriesContext(connection) as queries:
+        assert delete_user(author)
+    assert not Recipe.objects.filter(author=author).exists()
+    assert Recipe.all_objects.filter(
+        author=author, deleted_at__isnull=False
+    ).count() == len(recipe_ids)
+    events = OutboxEvent.objects.filter(topic="recipe.deleted")
+    assert {event.payload["recipe_id"] for event in events} == recipe_ids
+    assert {event.payload["author_id"] for event in events} == {author.pk}
+    # id рецептов не отправляются обратно в базу одним списком.
+    assert all(
+        query["sql"].count(",") < 100
+        for query in queries.captured_queries
+        if '"recipes_recipe"' in query["sql"]
+    )
+
+
+def test_delete_recipe_once(author, recipes):
+    recipe = recipes.first()
+    assert delete_recipe(recipe)
+    assert not delete_recipe(recipe)
+    assert OutboxEvent.objects.filter(topic="recipe.deleted").count() == 1
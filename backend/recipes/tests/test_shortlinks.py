@@ -0,0 +1,122 @@
+import os
+import time
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import QuerySet
+
+from recipes import shortlinks
+from recipes.models import Recipe
+from users.models import User
+
+OLD_IDS = range(1, 2000)
+
+
+@pytest.fixture(autouse=True)
+def foreground_visits(monkeypatch):
+    # Фоновый поток писал бы в базу мимо транзакции теста: переходы
+    # сохраняются явным flush().
+    monkeypatch.setattr(shortlinks.visit_counter, "_flusher_pid", os.getpid())
+
+
+@pytest.fixture
+def recipes(db):
+    author = User.objects.create_user(
+        username="author",
+        email="author@example.com",
+        password="pass12345!",
+        first_name="Author",
+        last_name="Author",
+    )
+    Recipe.objects.bulk_create(
+        Recipe(pk=pk, author=author, name=f"Рецепт {pk}", text="-", cooking_time=1)
+        for pk in OLD_IDS
+    )
+    yield
+    # Иначе накопленные переходы попытаются сохраниться при выходе из pytest,
+    # когда тестовой базы уже нет.
+    shortlinks.visit_counter.flush()
+
+
+def redirect_target(client, code):
+    response = client.get(f"/s/{code}/")
+    if response.status_code == 404:
+        return None
+    assert response.status_code == 302, code
+    return response["Location"]
+
+
+def test_codes_round_trip_and_are_never_numeric():
+    for recipe_id in range(1, 200_000, 7):
+        code = shortlinks.encode(recipe_id)
+        assert not code.isdigit(), recipe_id
+        assert shortlinks.decode(code) == recipe_id
+
+
+def test_old_numeric_links_keep_working(client, recipes):
+    # Часть чисел проходит и проверку нового кода, но ведёт на свой рецепт.
+    assert any(shortlinks.decode(str(pk)) for pk in OLD_IDS)
+    for pk in OLD_IDS:
+        assert redirect_target(client, pk) == settings.FRONTEND_RECIPE_URL.format(id=pk)
+
+
+def test_new_codes_redirect(client, recipes):
+    for pk in OLD_IDS[::50]:
+        assert redirect_target(
+            client, shortlinks.encode(pk)
+        ) == settings.FRONTEND_RECIPE_URL.format(id=pk)
+
+
+def test_unknown_codes_are_not_found(client, recipes):
+    assert redirect_target(client, OLD_IDS[-1] + 1) is None
+    assert redirect_target(client, shortlinks.encode(OLD_IDS[-1] + 1)) is None
+    assert redirect_target(client, "9" * 20) is None
+
+
+def test_redirect_does_not_write_visits(recipes, client, django_assert_num_queries):
+    code = shortlinks.encode(1)
+    client.get(f"/s/{code}/")
+    with django_assert_num_queries(0):
+        for _ in range(shortlinks.visit_counter.flush_size):
+            assert client.get(f"/s/{code}/").status_code == 302
+    shortlinks.visit_counter.flush()
+    visits = shortlinks.visit_counter.flush_size + 1
+    assert Recipe.objects.get(pk=1).short_link_visits == visits
+
+
+def test_failed_flush_keeps_visits(recipes):
+    counter = shortlinks.VisitCounter(flush_size=10, flush_interval=60)
+    counter._flusher_pid = os.getpid()
+    counter.record(1)
+    counter.record(1)
+    with mock.patch.object(QuerySet, "update", side_effect=DatabaseError):
+        counter.flush()
+    counter.record(1)
+    counter.flush()
+    assert Recipe.objects.get(pk=1).short_link_visits == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_visits_are_flushed_in_background():
+    Recipe.objects.create(
+        pk=1,
+        author=User.objects.create_user(
+            username="author",
+            email="author@example.com",
+            password="pass12345!",
+            first_name="Author",
+            last_name="Author",
+        ),
+        name="Рецепт",
+        text="-",
+        cooking_time=1,
+    )
+    counter = shortlinks.VisitCounter(flush_size=2, flush_interval=60)
+    counter.record(1)
+    counter.record(1)
+    deadline = time.monotonic() + 5
+    while Recipe.objects.get(pk=1).short_link_visits != 2:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from django.utils.dateparse import parse_datetime
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from recipes.transfer import RecipeImporter, export_lines
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def author():
+    return User.objects.create_user(
+        username="author",
+        email="author@example.com",
+        password="pass12345!",
+        first_name="Author",
+        last_name="Author",
+    )
+
+
+def record(name, pub_date, ingredients):
+    return json.dumps(
+        {
+            "name": name,
+            "text": "-",
+            "cooking_time": 10,
+            "servings": 2,
+            "pub_date": pub_date,
+            "author": "author@example.com",
+            "ingredients": [
+                {"name": ingredient, "measurement_unit": "г", "amount": amount}
+                for ingredient, amount in ingredients
+            ],
+        },
+        ensure_ascii=False,
+    )
+
+
+def test_import_keeps_dates_and_links_ingredients(author):
+    lines = [
+        record("Первый", "2020-01-01T10:00:00+00:00", [("соль", 1)]),
+        record("Второй", "2021-02-02T10:00:00+00:00", [("сахар", 2), ("соль", 3)]),
+        record("Третий", "2019-03-03T10:00:00+00:00", [("перец", 4)]),
+    ]
+    importer = RecipeImporter(create_ingredients=True, batch_size=2)
+
+    assert importer.run(lines) == 3
+    assert importer.errors == []
+    assert Recipe._meta.get_field("pub_date").auto_now_add
+    for line in lines:
+        expected = json.loads(line)
+        recipe = Recipe.objects.get(name=expected["name"])
+        assert recipe.pub_date == parse_datetime(expected["pub_date"])
+        assert sorted(
+            RecipeIngredient.objects.filter(recipe=recipe).values_list(
+                "ingredient__name", "amount"
+            )
+        ) == sorted((item["name"], item["amount"]) for item in expected["ingredients"])
+
+
+def test_export_import_round_trip(author):
+    Ingredient.objects.create(name="соль", measurement_unit="г")
+    lines = [record("Первый", "2020-01-01T10:00:00+00:00", [("соль", 1)])]
+    RecipeImporter().run(lines)
+    exported = list(export_lines(Recipe.objects.all(), images="none"))
+    Recipe.objects.all().delete()
+
+    RecipeImporter().run(exported)
+
+    assert list(export_lines(Recipe.objects.all(), images="none")) == exported
@@ -0,0 +1,264 @@
+import base64
+import binascii
+import json
+import os
+from itertools import islice
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils._os import safe_join
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from users.models import User
+from .models import Ingredient, Recipe, RecipeIngredient, build_ingredients_snapshot
+
+IMAGE_MODES = ("embed", "reference", "none")
+MAX_AMOUNT = 32767
+
+
+class RecordError(ValueError):
+    pass
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_lines(queryset, images="embed", batch_size=1000):
+    image_field = Recipe._meta.get_field("image")
+    for row in (
+        queryset.order_by("pk")
+        .values(
+            "name",
+            "text",
+            "cooking_time",
+            "servings",
+            "pub_date",
+            "image",
+            "ingredients_snapshot",
+            "author__email",
+        )
+        .iterator(chunk_size=batch_size)
+    ):
+        record = {
+            "name": row["name"],
+            "text": row["text"],
+            "cooking_time": row["cooking_time"],
+            "servings": row["servings"],
+            "pub_date": row["pub_date"].isoformat(),
+            "author": row["author__email"],
+            "ingredients": [
+                {
+                    "name": item["name"],
+                    "measurement_unit": item["measurement_unit"],
+                    "amount": item["amount"],
+                }
+                for item in row["ingredients_snapshot"]
+            ],
+        }
+        if row["image"] and images == "reference":
+            record["image"] = {"path": row["image"]}
+        elif row["image"] and images == "embed":
+            with image_field.storage.open(row["image"], "rb") as image:
+                record["image"] = {
+                    "name": os.path.basename(row["image"]),
+                    "data": base64.b64encode(image.read()).decode(),
+                }
+        yield json.dumps(record, ensure_ascii=False)
+
+
+class RecipeImporter:
+
+    def __init__(
+        self,
+        default_author=None,
+        create_ingredients=False,
+        media_root=None,
+        batch_size=1000,
+        using="default",
+    ):
+        self.default_author = default_author
+        self.create_ingredients = create_ingredients
+        self.media_root = media_root
+        self.batch_size = batch_size
+        self.using = using
+        self.image_field = Recipe._meta.get_field("image")
+        self.ingredients = {}
+        self.authors = {}
+        self.imported = 0
+        self.errors = []
+
+    def run(self, lines):
+        records = self.parse(lines)
+        for batch in chunked(records, self.batch_size):
+            self.import_batch(batch)
+        return self.imported
+
+    def parse(self, lines):
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, self.parse_record(json.loads(line))
+            except RecordError as e:
+                self.errors.append((number, str(e)))
+            except (ValueError, KeyError, TypeError) as e:
+                self.errors.append((number, f"Некорректная запись: {e!r}"))
+
+    def parse_record(self, record):
+        parsed = {
+            "name": str(record["name"]),
+            "text": str(record.get("text", "")),
+            "cooking_time": int(record["cooking_time"]),
+            "servings": int(record.get("servings") or settings.DEFAULT_SERVINGS),
+            "pub_date": parse_datetime(record.get("pub_date") or ""),
+            "author": record.get("author") or self.default_author,
+            "ingredients": [
+                (str(item["name"]), str(item["measurement_unit"]), int(item["amount"]))
+                for item in record["ingredients"]
+            ],
+        }
+        if parsed["cooking_time"] < settings.MIN_COOKING_TIME:
+            raise RecordError(f"Некорректное время: {parsed['cooking_time']}")
+        if not settings.MIN_SERVINGS <= parsed["servings"] <= settings.MAX_SERVINGS:
+            raise RecordError(f"Некорректное число порций: {parsed['servings']}")
+        if any(
+            not settings.MIN_INGREDIENT_AMOUNT <= amount <= MAX_AMOUNT
+            for _, _, amount in parsed["ingredients"]
+        ):
+            raise RecordError("Некорректное количество ингредиента")
+        parsed["image"] = (
+            self.save_image(record["image"]) if record.get("image") else None
+        )
+        return parsed
+
+    def import_batch(self, batch):
+        self.resolve_authors({record["author"] for _, record in batch})
+        self.resolve_ingredients(
+            {
+                (name, unit)
+                for _, record in batch
+                for name, unit, _ in record["ingredients"]
+            }
+        )
+
+        recipes = []
+        for number, record in batch:
+            try:
+                recipes.append((self.build_recipe(record), record))
+            except RecordError as e:
+                self.errors.append((number, str(e)))
+        if not recipes:
+            return
+
+        with transaction.atomic(using=self.using):
+            self.insert_recipes([recipe for recipe, _ in recipes])
+            RecipeIngredient.objects.using(self.using).bulk_create(
+                [
+                    RecipeIngredient(
+                        recipe=recipe,
+                        ingredient_id=item["id"],
+                        amount=item["amount"],
+                    )
+                    for recipe, _ in recipes
+                    for item in recipe.ingredients_snapshot
+                ],
+                batch_size=self.batch_size,
+            )
+        self.imported += len(recipes)
+
+    def build_recipe(self, record):
+        author_id = self.authors.get(record["author"])
+        if author_id is None:
+            raise RecordError(f"Автор не найден: {record['author']}")
+        rows = []
+        for name, unit, amount in record["ingredients"]:
+            ingredient_id = self.ingredients.get((name, unit))
+            if ingredient_id is None:
+                raise RecordError(f"Ингредиент не найден: {name}, {unit}")
+            rows.append((ingredient_id, name, unit, amount))
+        if not rows:
+            raise RecordError("В рецепте нет ингредиентов")
+        if len({row[0] for row in rows}) != len(rows):
+            raise RecordError("Ингредиенты не должны повторяться")
+        recipe = Recipe(
+            author_id=author_id,
+            name=record["name"],
+            text=record["text"],
+            cooking_time=record["cooking_time"],
+            servings=record["servings"],
+            pub_date=record["pub_date"] or timezone.now(),
+            ingredients_snapshot=build_ingredients_snapshot(rows),
+        )
+        if record["image"]:
+            recipe.image = record["image"]
+        return recipe
+
+    def save_image(self, image):
+        upload_to = self.image_field.upload_to
+        try:
+            if "data" in image:
+                content = ContentFile(base64.b64decode(image["data"], validate=True))
+                name = os.path.basename(image.get("name") or "image")
+                return self.image_field.storage.save(upload_to + name, content)
+            path = safe_join(self.media_root, image["path"])
+            with open(path, "rb") as source:
+                return self.image_field.storage.save(
+                    upload_to + os.path.basename(path), File(source)
+                )
+        except (KeyError, TypeError, OSError, binascii.Error, ValueError) as e:
+            raise RecordError(f"Не удалось сохранить изображение: {e!r}")
+
+    def resolve_authors(self, emails):
+        missing = {email for email in emails if email not in self.authors} - {None}
+        if missing:
+            self.authors.update(
+                User.objects.using(self.using)
+                .filter(email__in=missing)
+                .values_list("email", "pk")
+            )
+
+    def resolve_ingredients(self, keys):
+        missing = {key for key in keys if key not in self.ingredients}
+        if not missing:
+            return
+        if self.create_ingredients:
+            Ingredient.objects.using(self.using).bulk_create(
+                [
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in missing
+                ],
+                ignore_conflicts=True,
+            )
+        for names in chunked(sorted({name for name, _ in missing}), 500):
+            for pk, name, unit in (
+                Ingredient.objects.using(self.using)
+                .filter(name__in=names)
+                .values_list("pk", "name", "measurement_unit")
+            ):
+                self.ingredients[(name, unit)] = pk
+
+    def insert_recipes(self, recipes):
+        manager = Recipe.objects.using(self.using)
+        # auto_now_add заменяет даты из файла текущим временем, поэтому они
+        # восстанавливаются отдельным UPDATE после вставки.
+        pub_dates = [recipe.pub_date for recipe in recipes]
+        if connections[self.using].features.can_return_rows_from_bulk_insert:
+            manager.bulk_create(recipes, batch_size=self.batch_size)
+        else:
+            # Без RETURNING (SQLite) id новой строки надёжно известен только
+            # при вставке по одной; raw=True, как и bulk_create, не публикует
+            # события создания рецепта.
+            for recipe in recipes:
+                recipe.save_base(using=self.using, raw=True, force_insert=True)
+        for recipe, pub_date in zip(recipes, pub_dates):
+            recipe.pub_date = pub_date
+        manager.bulk_update(recipes, ["pub_date"], batch_size=self.batch_size)
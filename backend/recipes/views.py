@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.http import Http404, HttpResponseRedirect
+
+from . import shortlinks
+
+
+def short_link_redirect(request, code):
+    # Старые ссылки /s/<id>/: примерно каждое пятидесятое число проходит и
+    # проверку нового кода, поэтому сначала ищется рецепт с таким id.
+    if (
+        code.isdigit()
+        and 0 < int(code) <= shortlinks.MAX_RECIPE_ID
+        and shortlinks.recipe_exists(int(code))
+    ):
+        recipe_id = int(code)
+    else:
+        recipe_id = shortlinks.decode(code)
+        if recipe_id is None or not shortlinks.recipe_exists(recipe_id):
+            raise Http404("Рецепт не найден")
+
+    shortlinks.visit_counter.record(recipe_id)
+    return HttpResponseRedirect(settings.FRONTEND_RECIPE_URL.format(id=recipe_id))
@@ -1,18 +1,30 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
+from foodgram.admin_tools import (
+    LargeTableAdminMixin,
+    SoftDeleteAdminMixin,
+    id_range_filter,
+)
+from recipes.deletion import delete_user
 from .models import User, Subscription
 
 
 @admin.register(User)
-class UserAdmin(UserAdmin):
+class UserAdmin(SoftDeleteAdminMixin, LargeTableAdminMixin, UserAdmin):
     list_display = ("id", "username", "email", "first_name", "last_name")
-    list_filter = ("username", "email")
+    list_filter = ("is_staff", "is_active")
     search_fields = ("username", "email")
+    soft_delete_function = staticmethod(delete_user)
 
 
 @admin.register(Subscription)
-class SubscriptionAdmin(admin.ModelAdmin):
+class SubscriptionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "user", "author")
-    list_filter = ("user", "author")
+    list_filter = (
+        id_range_filter("user", "ID подписчика"),
+        id_range_filter("author", "ID автора"),
+    )
+    list_select_related = ("user", "author")
+    autocomplete_fields = ("user", "author")
     search_fields = ("user__username", "author__username")
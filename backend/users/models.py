@@ -1,8 +1,34 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 from django.conf import settings
 
 
+class ActiveUserManager(UserManager):
+    # Удалённые пользователи скрыты сразу, а сами строки и зависимые от них
+    # удаляет фоновая задача recipes.purge_user.
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class LinkManager(models.Manager):
+    # Связи с удалёнными пользователями и рецептами скрыты так же сразу,
+    # хотя сами строки удаляются фоновой задачей вместе с владельцем.
+    # Поля заданы атрибутом класса: related-менеджеры создают его без
+    # аргументов.
+    links = ()
+
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .filter(**{f"{link}__deleted_at__isnull": True for link in self.links})
+        )
+
+
+class SubscriptionManager(LinkManager):
+    links = ("user", "author")
+
+
 class User(AbstractUser):
 
     email = models.EmailField(
@@ -19,6 +45,12 @@ class User(AbstractUser):
     avatar = models.ImageField(
         upload_to="avatars/", blank=True, null=True, verbose_name="Аватар"
     )
+    deleted_at = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name="Удалён"
+    )
+
+    objects = ActiveUserManager()
+    all_objects = UserManager()
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]
@@ -30,6 +62,11 @@ class User(AbstractUser):
         indexes = [
             models.Index(fields=["email"]),
             models.Index(fields=["username"]),
+            models.Index(
+                fields=["deleted_at"],
+                name="user_deleted_at_idx",
+                condition=models.Q(deleted_at__isnull=False),
+            ),
         ]
 
     def __str__(self):
@@ -48,6 +85,9 @@ class Subscription(models.Model):
         User, on_delete=models.CASCADE, related_name="following", verbose_name="Автор"
     )
 
+    objects = SubscriptionManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name = "Подписка"
         verbose_name_plural = "Подписки"